@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+
+# Times the dictionary hot paths against a synthetic dictionary served by StubBridge and
+# prints the results as JSON, e.g.
+#
+#   python3 benchmark/run_benchmarks.py --commands 20000 --telemetry 20000 -o results.json
+#
+# The memory section compares what a loaded DictionaryInfo keeps on the python heap with
+# the size of the names, struct json and info text it was loaded from.
+#
+# Needs a sourced ROS 2 workspace with rqt_fsw_bridge_dictionary installed. Without a
+# display the Qt offscreen platform is used.
+
+import argparse
+import gc
+import json
+import os
+import platform
+import queue
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import rclpy
+from rclpy.executors import MultiThreadedExecutor
+
+from rqt_fsw_bridge_dictionary.bridge_client import BridgeClient, DEFAULT_BRIDGE_NAMESPACE
+from rqt_fsw_bridge_dictionary.dictionary_docs import iter_documentation
+from rqt_fsw_bridge_dictionary.dictionary_ingest import DictionaryIngest
+from rqt_fsw_bridge_dictionary.dictionary_info import DictionaryInfo
+from rqt_fsw_bridge_dictionary.packet_layout import PacketLayout
+
+from stub_bridge import StubBridge
+from synthetic_dictionary import generate_message_infos
+
+
+RESULTS_FORMAT_VERSION = 1
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.mean(ordered),
+        'p50_ms': ordered[len(ordered) // 2],
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max_ms': ordered[-1],
+    }
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return summarize(samples)
+
+
+def wait_for(request, timeout_sec=60.0):
+    done = threading.Event()
+    responses = []
+
+    def callback(r):
+        responses.append(r)
+        done.set()
+
+    request(callback)
+    done.wait(timeout_sec)
+    return responses[0] if responses else None
+
+
+def bench_bridge(client, args, msg_names):
+    results = {}
+    results['get_message_info_round_trip'] = time_calls(
+        lambda: wait_for(client.request_message_info), args.repeat)
+    rng = random.Random(1)
+    results['set_message_info_round_trip'] = time_calls(
+        lambda: wait_for(lambda cb: client.request_set_message_info(
+            'cfe_msgs', rng.choice(msg_names), 'benchmark info', cb)), args.saves)
+    return results
+
+
+def load_in_chunks(node, message_infos):
+    # what SharedDictionaryStore does for a first load, without the Qt signals in between;
+    # returns the ms until the first chunk was shown
+    chunks = queue.Queue()
+    dictionary_info = DictionaryInfo(node)
+    dictionary_info.begin_load('stub_plugin', 'cfe_msgs')
+    t0 = time.perf_counter()
+    DictionaryIngest(message_infos, '', on_chunk=lambda part, done, total: chunks.put(part),
+                     on_finished=lambda cancelled: chunks.put(None)).start()
+    first_ms = None
+    part = chunks.get()
+    while part is not None:
+        dictionary_info.add_loaded(part)
+        dictionary_info.get_message_dict()
+        if first_ms is None:
+            first_ms = (time.perf_counter() - t0) * 1000.0
+        part = chunks.get()
+    dictionary_info.finish_load()
+    # the type usage, like init(); the search index is left out of both
+    dictionary_info.build_type_usage()
+    return first_ms
+
+
+def bench_dictionary_info(node, message_infos, args):
+    dictionary_info = DictionaryInfo(node)
+    results = {'dictionary_info_init': time_calls(
+        lambda: dictionary_info.init('stub_plugin', 'cfe_msgs', message_infos), args.repeat)}
+    # a whole chunked load, and the time until its first chunk
+    first_chunk_ms = []
+    results['chunked_load'] = time_calls(
+        lambda: first_chunk_ms.append(load_in_chunks(node, message_infos)), args.repeat)
+    results['chunked_load_first_chunk'] = summarize(first_chunk_ms)
+    # every run starts from a fresh PacketLayout, i.e. without memoized sizes
+    results['message_sizes'] = time_calls(
+        lambda: PacketLayout(dictionary_info).message_sizes(), args.repeat)
+    # the whole markdown document, rendered and discarded chunk by chunk
+    results['iter_documentation'] = time_calls(
+        lambda: deque(iter_documentation(dictionary_info), maxlen=0), args.repeat)
+    results.update(bench_search(dictionary_info, args))
+    return results
+
+
+# type-ahead prefixes matching most messages of a synthetic dictionary: 'he' (helpers and
+# heater), 'field_0' (every field name), 'cmd_0' (thousands of tokens), and two terms
+SEARCH_QUERIES = ('h', 'he', 'hea', 'field_0', 'cmd_0', 'valve he')
+
+
+def bench_search(dictionary_info, args):
+    # the first call of each query on a fresh index, i.e. past the prefix cache unless
+    # warm_up() filled it, then repeated calls
+    dictionary_info.build_search_index()
+    results = {}
+    for query in SEARCH_QUERIES:
+        key = query.replace(' ', '_')
+        results['search_first_' + key] = time_calls(lambda: dictionary_info.search(query), 1)
+        results['search_' + key] = time_calls(lambda: dictionary_info.search(query),
+                                              args.repeat)
+    return results
+
+
+def payload_bytes(message_infos):
+    return sum(len(m.msg_name.encode('utf-8')) + len(m.json.encode('utf-8'))
+               + len(m.info.encode('utf-8')) for m in message_infos)
+
+
+def bench_memory(node, args):
+    # python heap still held by a DictionaryInfo once the response list is gone,
+    # compared with the size of the names, struct json and info text it was built from
+    gc.collect()
+    baseline, _ = tracemalloc.get_traced_memory()
+    message_infos = generate_message_infos(args.commands, args.telemetry, args.helpers,
+                                           args.depth, args.fields, args.sequence_ratio,
+                                           args.info_size)
+    payload = payload_bytes(message_infos)
+    dictionary_info = DictionaryInfo(node)
+    dictionary_info.init('stub_plugin', 'cfe_msgs', message_infos)
+    del message_infos
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    dictionary_info.build_search_index()
+    gc.collect()
+    with_search = tracemalloc.get_traced_memory()[0] - baseline
+    del dictionary_info
+    return {
+        'payload_bytes': payload,
+        'dictionary_info_bytes': retained,
+        'dictionary_info_ratio': retained / payload,
+        'with_search_index_bytes': with_search,
+    }
+
+
+def bench_widget(node, message_infos, args):
+    if not os.environ.get('DISPLAY'):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from python_qt_binding.QtWidgets import QApplication
+    from rqt_fsw_bridge_dictionary.bridge_dictionary_widget import BridgeDictionaryWidget
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    widget = BridgeDictionaryWidget(node, None)
+    bridge = widget.add_bridge(DEFAULT_BRIDGE_NAMESPACE)
+    bridge.set_plugin_names('stub_plugin.stub', 'cfe_msgs')
+    bridge.msg_dict = bridge.dictionary_info.init('stub_plugin', 'cfe_msgs', message_infos)
+
+    results = {}
+    results['build_dictionary_tree'] = time_calls(
+        lambda: widget.build_dictionary_tree(bridge), args.repeat)
+
+    model = widget._msg_tree_model
+    indexes = []
+    for category in model.category_indexes():
+        while model.canFetchMore(category):
+            model.fetchMore(category)
+        indexes.extend(model.index(row, 0, category) for row in range(model.rowCount(category)))
+    rng = random.Random(2)
+    clicks = [rng.choice(indexes) for _ in range(args.clicks)]
+    results['on_msg_item_clicked'] = time_calls(
+        lambda: widget.on_msg_item_clicked(clicks.pop()), args.clicks)
+    names = [model.message_name(i) for i in indexes]
+    results['build_msg_struct_tree'] = time_calls(
+        lambda: (widget.msg_struct_tree.clear(),
+                 widget.build_msg_struct_tree(bridge, rng.choice(names))), args.clicks)
+
+    widget.shutdown_plugin()
+    app.processEvents()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark rqt_fsw_bridge_dictionary')
+    parser.add_argument('--commands', type=int, default=5000)
+    parser.add_argument('--telemetry', type=int, default=5000)
+    parser.add_argument('--helpers', type=int, default=500)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fields', type=int, default=8)
+    parser.add_argument('--sequence-ratio', type=float, default=0.1)
+    parser.add_argument('--info-size', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--clicks', type=int, default=200)
+    parser.add_argument('--saves', type=int, default=100)
+    parser.add_argument('--no-gui', action='store_true', help='skip the Qt benchmarks')
+    parser.add_argument('--max-memory-ratio', type=float, default=None,
+                        help='exit with 1 if DictionaryInfo holds more than this many bytes '
+                             'per payload byte')
+    parser.add_argument('-o', '--output', default='-', help='results file (default: stdout)')
+    args, ros_args = parser.parse_known_args(argv)
+
+    params = {k: v for k, v in vars(args).items() if k != 'output'}
+    message_infos = generate_message_infos(args.commands, args.telemetry, args.helpers,
+                                           args.depth, args.fields, args.sequence_ratio,
+                                           args.info_size)
+    msg_names = [m.msg_name for m in message_infos]
+
+    rclpy.init(args=ros_args)
+    stub = StubBridge(message_infos)
+    node = rclpy.create_node('bridge_dictionary_benchmark')
+    executor = MultiThreadedExecutor()
+    executor.add_node(stub)
+    executor.add_node(node)
+    spinner = threading.Thread(target=executor.spin, daemon=True)
+    spinner.start()
+
+    results = {}
+    tracemalloc.start()
+    try:
+        memory = bench_memory(node, args)
+        client = BridgeClient(node)
+        client.get_message_info_client.wait_for_service(timeout_sec=10.0)
+        results.update(bench_bridge(client, args, msg_names))
+        client.shutdown()
+        results.update(bench_dictionary_info(node, message_infos, args))
+        if not args.no_gui:
+            results.update(bench_widget(node, message_infos, args))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        executor.shutdown()
+        stub.destroy_node()
+        node.destroy_node()
+        rclpy.shutdown()
+
+    report = {
+        'version': RESULTS_FORMAT_VERSION,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'params': params,
+        'results': results,
+        'memory': {
+            **memory,
+            'python_peak_bytes': peak,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+    }
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    json.dump(report, out, indent=2)
+    out.write('\n')
+    if out is not sys.stdout:
+        out.close()
+    if args.max_memory_ratio is not None and \
+            memory['dictionary_info_ratio'] > args.max_memory_ratio:
+        sys.stderr.write('DictionaryInfo holds %.2f bytes per payload byte\n'
+                         % memory['dictionary_info_ratio'])
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
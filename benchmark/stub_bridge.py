@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+
+import rclpy
+from rclpy.node import Node
+
+from fsw_ros2_bridge_msgs.srv import GetMessageInfo, SetMessageInfo, GetPluginInfo
+
+from synthetic_dictionary import generate_message_infos
+
+
+class StubBridge(Node):
+    """Serves the three FSW bridge dictionary services from an in-memory list."""
+
+    def __init__(self, message_infos, namespace='/fsw_ros2_bridge',
+                 plugin_name='stub_plugin.stub', msg_pkg='cfe_msgs'):
+        super(StubBridge, self).__init__('stub_fsw_bridge')
+        self._plugin_name = plugin_name
+        self._msg_pkg = msg_pkg
+        self._message_infos = message_infos
+        self._by_name = {m.msg_name: m for m in message_infos}
+        self.set_count = 0
+
+        ns = namespace.rstrip('/')
+        self.create_service(GetPluginInfo, ns + '/get_plugin_info', self.get_plugin_info)
+        self.create_service(GetMessageInfo, ns + '/get_message_info', self.get_message_info)
+        self.create_service(SetMessageInfo, ns + '/set_message_info', self.set_message_info)
+
+    def get_plugin_info(self, request, response):
+        response.plugin_name = self._plugin_name
+        response.msg_pkg = self._msg_pkg
+        return response
+
+    def get_message_info(self, request, response):
+        response.msg_info = self._message_infos
+        return response
+
+    def set_message_info(self, request, response):
+        m = self._by_name.get(request.msg_info.msg_name)
+        if m is not None:
+            m.info = request.msg_info.info
+        self.set_count += 1
+        return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stub FSW bridge serving a synthetic dictionary')
+    parser.add_argument('--commands', type=int, default=1000)
+    parser.add_argument('--telemetry', type=int, default=1000)
+    parser.add_argument('--helpers', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--namespace', default='/fsw_ros2_bridge')
+    args, ros_args = parser.parse_known_args(argv)
+
+    rclpy.init(args=ros_args)
+    node = StubBridge(generate_message_infos(args.commands, args.telemetry, args.helpers,
+                                             args.depth), args.namespace)
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    node.destroy_node()
+    rclpy.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
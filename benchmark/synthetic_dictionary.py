@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import json
+import random
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+
+PRIMITIVES = ["int8", "int16", "int32", "uint8", "uint16", "uint32",
+              "float32", "bool", "string"]
+
+
+def _info_text(rng, size):
+    words = []
+    n = 0
+    while n < size:
+        word = rng.choice(["packet", "housekeeping", "counter", "mode", "status", "valve",
+                           "heater", "voltage", "current", "attitude", "rate", "table"])
+        words.append(word)
+        n += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def _message_info(name, msg_type, fields, info):
+    m = MessageInfo()
+    m.msg_name = name
+    m.msg_type = msg_type
+    m.json = json.dumps(fields)
+    m.info = info
+    return m
+
+
+def generate_message_infos(n_commands=1000, n_telemetry=1000, n_helpers=200, depth=3,
+                           fields_per_msg=8, sequence_ratio=0.1, info_size=200,
+                           msg_pkg="cfe_msgs", seed=0):
+    """Return a synthetic MessageInfo list shaped like a flight dictionary.
+
+    Helpers are split into ``depth`` layers; helpers in one layer only embed helpers
+    from the next, and commands and telemetry embed helpers from the first layer, so
+    the deepest struct is ``depth`` levels below a packet. ``sequence_ratio`` of the
+    nested fields are unbounded sequences.
+    """
+    rng = random.Random(seed)
+    layers = [[] for _ in range(max(depth, 1))]
+    for i in range(n_helpers):
+        layers[i % len(layers)].append("Helper%05d" % i)
+
+    def make_fields(nested_pool):
+        fields = {}
+        for j in range(fields_per_msg):
+            if nested_pool and rng.random() < 0.3:
+                t = msg_pkg + "/" + rng.choice(nested_pool)
+                if rng.random() < sequence_ratio:
+                    t = "sequence<" + t + ">"
+            else:
+                t = rng.choice(PRIMITIVES)
+            fields["field_%02d" % j] = t
+        return fields
+
+    msgs = []
+    for level, names in enumerate(layers):
+        nested_pool = layers[level + 1] if level + 1 < len(layers) else []
+        for name in names:
+            msgs.append(_message_info(name, MessageInfo.HELPER, make_fields(nested_pool),
+                                      _info_text(rng, info_size)))
+    for i in range(n_commands):
+        msgs.append(_message_info("CMD_%06d" % i, MessageInfo.COMMAND, make_fields(layers[0]),
+                                  _info_text(rng, info_size)))
+    for i in range(n_telemetry):
+        msgs.append(_message_info("TLM_%06d" % i, MessageInfo.TELEMETRY,
+                                  make_fields(layers[0]), _info_text(rng, info_size)))
+    rng.shuffle(msgs)
+    return msgs
@@ -33,6 +33,7 @@ setup(
     entry_points={
         'console_scripts': [
             'rqt_fsw_bridge_dictionary = ' + package_name + '.main:main',
+            'fsw_bridge_dictionary = ' + package_name + '.dictionary_cli:main',
         ],
     },
 )
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+from fsw_ros2_bridge_msgs.srv import GetMessageInfo, SetMessageInfo, GetPluginInfo
+
+
+DEFAULT_BRIDGE_NAMESPACE = '/fsw_ros2_bridge'
+
+
+class BridgeClient:
+    """Non-blocking client for the FSW bridge dictionary services.
+
+    Every request is sent with ``call_async`` and completed by whatever executor is
+    already spinning ``node`` (the rqt spinner thread inside the GUI), so no caller
+    ever blocks. ``callback(response)`` runs on that executor thread, or on a timer
+    thread with ``None`` when the request times out or is cancelled; GUI code must
+    marshal the result back onto its own thread.
+
+    When ``stats`` (a LatencyStats) is given, the round trip of every request is
+    recorded as ``bridge.<service>``, or ``bridge.<service>.failed``.
+    """
+
+    def __init__(self, node, namespace=DEFAULT_BRIDGE_NAMESPACE, stats=None):
+        self._node = node
+        self._stats = stats
+        self._namespace = namespace.rstrip('/')
+        self._lock = threading.Lock()
+        self._pending = {}
+
+        self.plugin_info_client =\
+            self._node.create_client(GetPluginInfo, self._namespace + '/get_plugin_info')
+        self.get_message_info_client =\
+            self._node.create_client(GetMessageInfo, self._namespace + '/get_message_info')
+        self.set_message_info_client =\
+            self._node.create_client(SetMessageInfo, self._namespace + '/set_message_info')
+
+    @property
+    def namespace(self):
+        return self._namespace
+
+    def plugin_info_ready(self):
+        return self.plugin_info_client.service_is_ready()
+
+    def get_message_info_ready(self):
+        return self.get_message_info_client.service_is_ready()
+
+    def request_plugin_info(self, callback, timeout_sec=5.0):
+        return self._call('get_plugin_info', self.plugin_info_client,
+                          GetPluginInfo.Request(), callback, timeout_sec)
+
+    def request_message_info(self, callback, timeout_sec=30.0):
+        return self._call('get_message_info', self.get_message_info_client,
+                          GetMessageInfo.Request(), callback, timeout_sec)
+
+    def request_set_message_info(self, pkg_name, msg_name, info, callback, timeout_sec=5.0):
+        req = SetMessageInfo.Request()
+        req.msg_info.pkg_name = pkg_name
+        req.msg_info.msg_name = msg_name
+        # probably should get type and json info here and send it back, but it is ignored on
+        # the server so whatever
+        req.msg_info.info = info
+        return self._call('set_message_info', self.set_message_info_client, req,
+                          callback, timeout_sec)
+
+    def cancel(self, future):
+        self._finish(future, None, cancel=True)
+
+    def cancel_all(self):
+        with self._lock:
+            futures = list(self._pending.keys())
+        for future in futures:
+            self.cancel(future)
+
+    def shutdown(self):
+        self.cancel_all()
+        for client in [self.plugin_info_client, self.get_message_info_client,
+                       self.set_message_info_client]:
+            self._node.destroy_client(client)
+
+    def _call(self, name, client, request, callback, timeout_sec):
+        start = time.perf_counter_ns()
+        future = client.call_async(request)
+        timer = None
+        if timeout_sec is not None and timeout_sec > 0:
+            timer = threading.Timer(timeout_sec, self._on_timeout, args=(future,))
+            timer.daemon = True
+        with self._lock:
+            self._pending[future] = (name, start, client, callback, timer)
+        if timer is not None:
+            timer.start()
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        response = None
+        if not future.cancelled():
+            if future.exception() is not None:
+                self._node.get_logger().error("bridge request failed: "
+                                              + str(future.exception()))
+            else:
+                response = future.result()
+        self._finish(future, response)
+
+    def _on_timeout(self, future):
+        self._node.get_logger().warn("bridge request timed out")
+        self._finish(future, None, cancel=True)
+
+    def _finish(self, future, response, cancel=False):
+        # whichever of completion, timeout or cancellation gets here first wins
+        with self._lock:
+            entry = self._pending.pop(future, None)
+        if entry is None:
+            return
+        name, start, client, callback, timer = entry
+        if timer is not None:
+            timer.cancel()
+        if self._stats is not None:
+            if response is None:
+                name += '.failed'
+            self._stats.record('bridge.' + name, time.perf_counter_ns() - start)
+        if cancel:
+            client.remove_pending_request(future)
+            future.cancel()
+        callback(response)
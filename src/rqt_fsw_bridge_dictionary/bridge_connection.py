@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import time
+
+from .bridge_client import BridgeClient
+from .dictionary_info import DictionaryInfo
+from .info_edit_queue import InfoEditQueue
+from .info_journal import InfoJournal
+
+
+_PLUGIN_INFO_SERVICE = '/get_plugin_info'
+
+
+def discover_bridge_namespaces(node, service_names=None):
+    # every namespace that offers a get_plugin_info service, from the ROS graph cache
+    if service_names is None:
+        service_names = [name for name, _ in node.get_service_names_and_types()]
+    namespaces = []
+    for name in service_names:
+        if name.endswith(_PLUGIN_INFO_SERVICE):
+            namespaces.append(name[:-len(_PLUGIN_INFO_SERVICE)] or '/')
+    return namespaces
+
+
+def parse_bridge_namespaces(text):
+    # 'ns1, ns2 *' -> (['/ns1', '/ns2'], True); '*' turns on discovery
+    namespaces = []
+    discover = False
+    for ns in text.replace(',', ' ').split():
+        if ns == '*':
+            discover = True
+            continue
+        ns = '/' + ns.strip('/')
+        if ns not in namespaces:
+            namespaces.append(ns)
+    return namespaces, discover
+
+
+def format_bridge_namespaces(namespaces, discover):
+    return ', '.join(list(namespaces) + (['*'] if discover else []))
+
+
+class BridgeConnection:
+    """Everything the dictionary view keeps per bridge.
+
+    Each bridge has its own client, DictionaryInfo, edit queue and info journal, so
+    a slow or missing bridge never holds up the others. While a bridge is absent, contact
+    attempts back off exponentially from ``min_retry_sec`` to ``max_retry_sec``.
+    """
+
+    def __init__(self, node, namespace, stats=None, on_commit_progress=None,
+                 on_commit_finished=None, min_retry_sec=1.0, max_retry_sec=30.0):
+        self.namespace = namespace.rstrip('/') or '/'
+        self.client = BridgeClient(node, self.namespace, stats=stats)
+        self.dictionary_info = DictionaryInfo(node, stats=stats)
+        self.edit_queue = InfoEditQueue(self.client,
+                                        on_progress=on_commit_progress,
+                                        on_finished=on_commit_finished,
+                                        on_committed=self.on_info_committed)
+        # local history of the info edits, opened once the plugin names are known
+        self.journal = None
+        # the DictionaryIngest of a dictionary still being loaded, see SharedDictionaryStore
+        self.ingest = None
+        # whether the local cache is being read for a first dictionary
+        self.reading_cache = False
+        # the user cancelled a load: nothing is fetched until reload_dictionary() or until
+        # the bridge left the graph and came back
+        self.load_cancelled = False
+        self.plugin_info = None
+        self.plugin_name = ""
+        self.plugin_pkg_name = ""
+        self.msg_pkg_name = ""
+        self.connected = False
+        self.request_pending = False
+        self._min_retry_sec = min_retry_sec
+        self._max_retry_sec = max_retry_sec
+        self._retry_sec = min_retry_sec
+        self._next_attempt = 0.0
+        # content hash of the dictionary currently shown, from the local cache or the bridge
+        self.digest = ""
+        self.msg_dict = {}
+        self.struct_layouts = {}
+
+    def set_plugin_names(self, plugin_name, msg_pkg):
+        self.plugin_name = plugin_name
+        self.plugin_pkg_name = plugin_name.split('.')[0]
+        self.msg_pkg_name = msg_pkg
+
+    def open_journal(self, path):
+        # raises OSError when the journal cannot be written
+        if self.journal is not None and self.journal.path == path:
+            self.journal.reload()
+            return
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.journal = InfoJournal(path).open()
+
+    def on_info_committed(self, msg_name, info):
+        journal = self.journal
+        if journal is not None:
+            journal.mark_committed(msg_name, info)
+
+    def services_ready(self):
+        return self.client.plugin_info_ready() and self.client.get_message_info_ready()
+
+    def attempt_due(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        return now >= self._next_attempt
+
+    def schedule_retry(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        self._next_attempt = now + self._retry_sec
+        self._retry_sec = min(self._retry_sec * 2, self._max_retry_sec)
+
+    def reset_backoff(self):
+        # the graph changed: try again right away
+        self._retry_sec = self._min_retry_sec
+        self._next_attempt = 0.0
+
+    def disconnect(self):
+        # the bridge went away; the dictionary stays on screen until it comes back
+        self.connected = False
+        self.plugin_info = None
+        self.reset_backoff()
+
+    def shutdown(self):
+        if self.ingest is not None:
+            self.ingest.cancel()
+            self.ingest = None
+        self.client.shutdown()
+        if self.journal is not None:
+            self.journal.close()
@@ -57,3 +57,6 @@ class BridgeDictionary(Plugin):
 
     def restore_settings(self, plugin_settings, instance_settings):
         self._widget.restore_settings(plugin_settings, instance_settings)
+
+    def trigger_configuration(self):
+        self._widget.trigger_configuration()
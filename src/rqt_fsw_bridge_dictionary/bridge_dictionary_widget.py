@@ -1,26 +1,52 @@
 #!/usr/bin/env python3
 
 from __future__ import division
+import json
 import os
-import ast
+import threading
+import time
 
 from python_qt_binding import loadUi
-from python_qt_binding.QtCore import QTimer, Slot
+from python_qt_binding.QtCore import Qt, QTimer, Signal, Slot
 from python_qt_binding.QtWidgets import QWidget, QTreeWidgetItem, QTableWidgetItem
-from PyQt5 import QtCore, QtWidgets
+from python_qt_binding.QtWidgets import QInputDialog, QLineEdit, QMenu
+from python_qt_binding.QtWidgets import QFileDialog, QMessageBox
+from PyQt5 import QtCore
 
-import rclpy
 from ament_index_python import get_resource
 
-from fsw_ros2_bridge_msgs.srv import GetMessageInfo, SetMessageInfo, GetPluginInfo
-
-from .dictionary_info import DictionaryInfo
+from .bridge_client import DEFAULT_BRIDGE_NAMESPACE
+from .bridge_connection import discover_bridge_namespaces
+from .bridge_connection import format_bridge_namespaces, parse_bridge_namespaces
+from .dictionary_docs import write_documentation
+from .dictionary_snapshot import load_snapshot, save_snapshot, snapshot_dictionary
+from .dictionary_tree_model import DictionaryTreeModel
+from .packet_layout import format_size
+from .packet_size_model import PacketSizeTableModel
 from .confirm_dialog import ConfirmDialog
+from .schema_diff import diff_snapshots
+from .schema_diff_dialog import SchemaDiffDialog
+from .shared_dictionary_store import SharedDictionaryStore
+from .type_expr import parse_type, unwrap_collections
+from .type_usage_dialog import TypeUsageDialog
 
 
 class BridgeDictionaryWidget(QWidget):
 
-    _column_names = ['structure', 'type']
+    _column_names = ['structure', 'type', 'size']
+
+    # item data roles used by the lazily expanded struct tree
+    _struct_type_role = Qt.UserRole
+    _struct_path_role = Qt.UserRole + 1
+    # message type of any non-primitive row, for the type usage menu
+    _struct_ref_role = Qt.UserRole + 2
+
+    # path and error text, empty on success; emitted by the documentation export thread
+    docs_exported = Signal(str, str)
+    # the same for the snapshot export thread
+    snapshot_exported = Signal(str, str)
+    # dialog title, SchemaDiff (None on error) and error text; emitted by the compare thread
+    snapshot_compared = Signal(str, object, str)
 
     def __init__(self, node, plugin):
         super(BridgeDictionaryWidget, self).__init__()
@@ -30,247 +56,674 @@ class BridgeDictionaryWidget(QWidget):
         self._node = node
         self._plugin = plugin
         self._logger = self._node.get_logger().get_child(n)
-        self._connected_to_bridge = False
-        self._msg_pkg_name = ""
-        self._plugin_pkg_name = ""
-        self._plugin_name = ""
 
         # set up UI
         _, package_path = get_resource('packages', 'rqt_fsw_bridge_dictionary')
         ui_file = os.path.join(package_path, 'share', 'rqt_fsw_bridge_dictionary',
                                'resource', 'BridgeDictionaryWidget.ui')
         loadUi(ui_file, self)
+        self._msg_tree_model = DictionaryTreeModel(self)
+        self.msg_tree_widget.setModel(self._msg_tree_model)
+        self._size_model = PacketSizeTableModel(self)
+        self.sizes_table.setModel(self._size_model)
         self.setup_ui_connections()
 
         self._column_index = {}
         for column_name in self._column_names:
             self._column_index[column_name] = len(self._column_index)
 
-        # bridge info
-        self._plugin_info = None
-        self._msg_dict = {}
-        self._dictionary_info = DictionaryInfo(self._node)
-
-        # ros clients
-        self.plugin_info_client =\
-            self._node.create_client(GetPluginInfo, '/fsw_ros2_bridge/get_plugin_info')
-        self.get_message_info_client =\
-            self._node.create_client(GetMessageInfo, '/fsw_ros2_bridge/get_message_info')
-        self.set_message_info_client =\
-            self._node.create_client(SetMessageInfo, '/fsw_ros2_bridge/set_message_info')
-
-        # connection timer
-        self._timer_wait_for_bridge = QTimer(self)
-        self._timer_wait_for_bridge.timeout.connect(self.wait_for_plugin)
+        # bridges, keyed by namespace, are shared with the other views of this process
+        # through the store, which fetches and holds each dictionary once and polls the
+        # bridges; _current is the bridge of the selected message
+        self._store = SharedDictionaryStore.attach(self._node)
+        self._stats = self._store.stats
+        self._bridges = {}
+        self._current = None
+        self._bridge_namespaces = [DEFAULT_BRIDGE_NAMESPACE]
+        self._discover_bridges = True
+        self._commit_progress = {}
+        self._load_progress = {}
+        self._store_slots = [(self._store.plugin_changed, self.on_plugin_changed),
+                             (self._store.dictionary_changed, self.on_dictionary_changed),
+                             (self._store.messages_added, self.on_messages_added),
+                             (self._store.load_progress, self.on_load_progress),
+                             (self._store.load_finished, self.on_load_finished),
+                             (self._store.indexes_ready, self.on_indexes_ready),
+                             (self._store.info_changed, self.on_info_changed),
+                             (self._store.commit_progress, self.on_commit_progress),
+                             (self._store.commit_finished, self.on_commit_finished),
+                             (self._store.graph_changed, self.on_graph_changed)]
+        for signal, slot in self._store_slots:
+            signal.connect(slot)
+        self.set_bridge_namespaces(self._bridge_namespaces, self._discover_bridges)
+
+        # type-ahead search, applied shortly after the last keystroke
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(100)
+        self._search_timer.timeout.connect(self.apply_search_filter)
+
+        # latency stats: shown on the stats tab, the store publishes them as diagnostics
+        self._timer_update_stats = QTimer(self)
+        self._timer_update_stats.timeout.connect(self.update_stats_table)
 
     def start(self):
-        self._timer_wait_for_bridge.start(1000)
+        self._store.start()
+        self._timer_update_stats.start(1000)
 
     def shutdown_plugin(self):
-        self._timer_wait_for_bridge.stop()
+        self._timer_update_stats.stop()
+        for signal, slot in self._store_slots:
+            signal.disconnect(slot)
+        for namespace in list(self._bridges):
+            self._store.release(namespace)
+        self._bridges.clear()
+        self._store.detach()
+
+    @Slot()
+    def update_stats_table(self):
+        if not self.stats_table.isVisible():
+            return
+        rows = self._stats.snapshot()
+        self.stats_table.setRowCount(len(rows))
+        for r, (name, count, mean_ms, p50_ms, p95_ms, max_ms) in enumerate(rows):
+            values = [name, str(count)] + ['%.3f' % v for v in (mean_ms, p50_ms, p95_ms, max_ms)]
+            for c, value in enumerate(values):
+                self.stats_table.setItem(r, c, QTableWidgetItem(value))
 
     def save_settings(self, plugin_settings, instance_settings):
         header_state = self.msg_tree_widget.header().saveState()
         instance_settings.set_value('tree_widget_header_state', header_state)
+        instance_settings.set_value('bridge_namespaces',
+                                    format_bridge_namespaces(self._bridge_namespaces,
+                                                             self._discover_bridges))
+        cached = [[b.namespace, b.plugin_name, b.msg_pkg_name]
+                  for b in self._bridges.values() if b.plugin_name]
+        instance_settings.set_value('cached_dictionaries', json.dumps(cached))
 
     def restore_settings(self, pluggin_settings, instance_settings):
         if instance_settings.contains('tree_widget_header_state'):
             header_state = instance_settings.value('tree_widget_header_state')
             if not self.msg_tree_widget.header().restoreState(header_state):
                 self._logger.warn('rqt_fsw_bridge_dictionary: Failed to restore header state.')
+        if instance_settings.contains('bridge_namespaces'):
+            namespaces, discover = parse_bridge_namespaces(
+                instance_settings.value('bridge_namespaces'))
+            self.set_bridge_namespaces(namespaces, discover)
+        if instance_settings.contains('cached_dictionaries'):
+            for namespace, plugin_name, msg_pkg in \
+                    json.loads(instance_settings.value('cached_dictionaries')):
+                bridge = self.add_bridge(namespace)
+                if not bridge.connected:
+                    self._store.load_cached_dictionary(bridge, plugin_name, msg_pkg)
+
+    def trigger_configuration(self):
+        text, ok = QInputDialog.getText(
+            self, "FSW Bridge Dictionary",
+            "Bridge namespaces (comma separated, '*' to discover bridges):",
+            QLineEdit.Normal,
+            format_bridge_namespaces(self._bridge_namespaces, self._discover_bridges))
+        if ok:
+            namespaces, discover = parse_bridge_namespaces(text)
+            self.set_bridge_namespaces(namespaces, discover)
+
+    def set_bridge_namespaces(self, namespaces, discover):
+        self._bridge_namespaces = list(namespaces)
+        self._discover_bridges = discover
+        if not discover:
+            for namespace in list(self._bridges):
+                if namespace not in self._bridge_namespaces:
+                    self.remove_bridge(namespace)
+        for namespace in self._bridge_namespaces:
+            self.add_bridge(namespace)
+        if discover:
+            for namespace in self._store.discover_bridge_namespaces():
+                self.add_bridge(namespace)
+
+    def add_bridge(self, namespace):
+        namespace = namespace.rstrip('/') or '/'
+        bridge = self._bridges.get(namespace)
+        if bridge is None:
+            bridge = self._store.acquire(namespace)
+            self._bridges[namespace] = bridge
+            if bridge.msg_dict:
+                # another view already fetched this dictionary
+                self.on_dictionary_changed(namespace)
+                self.update_plugin_labels()
+                self.update_pending_edits()
+            if bridge.ingest is not None:
+                self.on_load_progress(namespace, 0, bridge.ingest.total)
+        return bridge
+
+    def remove_bridge(self, namespace):
+        bridge = self._bridges.pop(namespace, None)
+        if bridge is None:
+            return
+        self._store.release(namespace)
+        self._msg_tree_model.remove_dictionary(namespace)
+        self.on_load_finished(namespace, True)
+        if self._current is bridge:
+            self._current = None
+        self.update_plugin_labels()
 
     def setup_ui_connections(self):
-        self.msg_tree_widget.itemClicked.connect(self.on_msg_item_clicked)
+        self.msg_tree_widget.clicked.connect(self.on_msg_item_clicked)
+        self.msg_struct_tree.itemExpanded.connect(self.on_struct_item_expanded)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
         self.clear_info_button.clicked.connect(self.clear_info_pressed)
         self.save_info_button.clicked.connect(self.save_info_pressed)
         self.reload_info_button.clicked.connect(self.reload_info_pressed)
+        self.commit_info_button.clicked.connect(self.commit_info_pressed)
+        self.export_snapshot_button.clicked.connect(self.export_snapshot_pressed)
+        self.tabWidget.currentChanged.connect(self.on_tab_changed)
+        self.compare_snapshot_button.clicked.connect(self.compare_snapshot_pressed)
+        self.export_docs_button.clicked.connect(self.export_docs_pressed)
+        self.cancel_load_button.clicked.connect(self.cancel_load_pressed)
+        self.reload_dictionary_button.clicked.connect(self.reload_dictionary_pressed)
+        self.docs_exported.connect(self.on_docs_exported)
+        self.snapshot_exported.connect(self.on_snapshot_exported)
+        self.snapshot_compared.connect(self.on_snapshot_compared)
+        self.msg_tree_widget.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.msg_tree_widget.customContextMenuRequested.connect(self.on_msg_tree_context_menu)
+        self.msg_struct_tree.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.msg_struct_tree.customContextMenuRequested.connect(
+            self.on_struct_tree_context_menu)
+
+    @Slot(object)
+    def on_graph_changed(self, service_names):
+        if self._discover_bridges:
+            for namespace in discover_bridge_namespaces(self._node, service_names):
+                self.add_bridge(namespace)
+
+    @Slot(str)
+    def on_plugin_changed(self, namespace):
+        if namespace in self._bridges:
+            self.update_plugin_labels()
+
+    def update_plugin_labels(self):
+        # labels follow the bridge of the selected message, or the first known bridge
+        bridge = self._current
+        if bridge is None:
+            bridge = next((b for b in self._bridges.values() if b.plugin_name), None)
+        plugin_name = bridge.plugin_name if bridge is not None else ""
+        msg_pkg = bridge.msg_pkg_name if bridge is not None else ""
+        if bridge is not None and len(self._bridges) > 1:
+            plugin_name += " (" + bridge.namespace + ")"
+        self.msg_pkg_label.setText(msg_pkg)
+        self.plugin_name_label.setText(plugin_name)
+
+    @Slot(str)
+    def on_dictionary_changed(self, namespace):
+        bridge = self._bridges.get(namespace)
+        if bridge is None:
+            return
+        if self._msg_tree_model.has_dictionary(namespace):
+            # a new dictionary, or the end of one shown while loading: only changed rows
+            # are touched
+            with self._stats.timer('tree.update_dictionary_tree'):
+                self._msg_tree_model.update_dictionary(bridge.msg_dict, bridge.namespace)
+            if bridge is self._current:
+                # the info text may hold unsaved edits, so only the struct is refreshed
+                _, msg_name = self.current_msg_ref()
+                self.msg_struct_tree.clear()
+                if bridge.dictionary_info.has_message(msg_name):
+                    self.build_msg_struct_tree(bridge, msg_name)
+        elif bridge.msg_dict:
+            self.build_dictionary_tree(bridge)
+        if self.sizes_table.isVisible():
+            self.update_sizes_table()
+        if bridge.msg_dict and self.search_edit.text().strip():
+            self.apply_search_filter()
+        self.update_pending_edits()
+
+    @Slot(str)
+    def on_messages_added(self, namespace):
+        # a first dictionary, shown chunk by chunk while it loads; the struct tree, sizes
+        # and search filter wait for on_dictionary_changed
+        bridge = self._bridges.get(namespace)
+        if bridge is None:
+            return
+        if self._msg_tree_model.has_dictionary(namespace):
+            with self._stats.timer('tree.update_dictionary_tree'):
+                self._msg_tree_model.update_dictionary(bridge.msg_dict, bridge.namespace)
+        else:
+            self.build_dictionary_tree(bridge)
+
+    @Slot(str, int, int)
+    def on_load_progress(self, namespace, done, total):
+        if namespace not in self._bridges:
+            return
+        self._load_progress[namespace] = (done, total)
+        self.load_progress_bar.setRange(0, sum(t for _, t in self._load_progress.values()))
+        self.load_progress_bar.setValue(sum(d for d, _ in self._load_progress.values()))
+        self.load_progress_bar.setVisible(True)
+        self.cancel_load_button.setVisible(True)
+        self.update_reload_button()
+
+    @Slot(str, bool)
+    def on_load_finished(self, namespace, cancelled):
+        self.update_reload_button()
+        if self._load_progress.pop(namespace, None) is None or self._load_progress:
+            return
+        self.load_progress_bar.setVisible(False)
+        self.cancel_load_button.setVisible(False)
+
+    @QtCore.pyqtSlot()
+    def cancel_load_pressed(self):
+        for namespace in list(self._load_progress):
+            bridge = self._bridges.get(namespace)
+            if bridge is not None:
+                self._store.cancel_load(bridge)
 
-    def send_plugin_info_request(self):
-        req = GetPluginInfo.Request()
-        future = self.plugin_info_client.call_async(req)
-        rclpy.spin_until_future_complete(self._node, future)
-        return future.result()
-
-    def send_get_message_info_request(self):
-        req = GetMessageInfo.Request()
-        future = self.get_message_info_client.call_async(req)
-        rclpy.spin_until_future_complete(self._node, future)
-        return future.result()
-
-    def send_set_message_info_request(self, msg_name, info):
-        req = SetMessageInfo.Request()
-        req.msg_info.pkg_name = self._msg_pkg_name
-        req.msg_info.msg_name = msg_name
-        # probably should get type and json info here and send it back, but it is ignored on
-        # the server so whatever
-        req.msg_info.info = info
-        future = self.set_message_info_client.call_async(req)
-        rclpy.spin_until_future_complete(self._node, future)
-        return future.result()
+    @QtCore.pyqtSlot()
+    def reload_dictionary_pressed(self):
+        for bridge in self._bridges.values():
+            if bridge.load_cancelled:
+                self._store.reload_dictionary(bridge)
+        self.update_reload_button()
+
+    def update_reload_button(self):
+        self.reload_dictionary_button.setVisible(
+            any(b.load_cancelled for b in self._bridges.values()))
+
+    def build_dictionary_tree(self, bridge):
+        with self._stats.timer('tree.build_dictionary_tree'):
+            # rows are created by the model as they become visible
+            self._msg_tree_model.set_dictionary(bridge.msg_dict, bridge.namespace)
+            self.expand_categories()
+
+    def expand_categories(self):
+        for index in self._msg_tree_model.category_indexes():
+            self.msg_tree_widget.expand(index)
+
+    @Slot(int)
+    def on_tab_changed(self, index):
+        if self.tabWidget.widget(index) is self.sizes_tab:
+            self.update_sizes_table()
+
+    def update_sizes_table(self):
+        # sizes of every message of every bridge, one batch per bridge
+        with self._stats.timer('layout.update_sizes_table'):
+            rows = []
+            for bridge in self._bridges.values():
+                dictionary_info = bridge.dictionary_info
+                for name, size, max_size in dictionary_info.packet_layout.message_sizes():
+                    rows.append((bridge.namespace, name, dictionary_info.get_message_type(name),
+                                 size, max_size))
+            self._size_model.set_rows(rows)
+
+    @Slot(str)
+    def on_indexes_ready(self, namespace):
+        if namespace in self._bridges and self.search_edit.text().strip():
+            self.apply_search_filter()
+
+    @Slot(str)
+    def on_search_text_changed(self, text):
+        self._search_timer.start()
 
     @Slot()
-    def wait_for_plugin(self):
-        if (not self._connected_to_bridge) and (not self._msg_dict):
-            self._node.get_logger().info("Trying to connect to FSW bridge...")
-            if self.plugin_info_client.wait_for_service(timeout_sec=1.0):
-                if self._plugin_info is None:
-                    self._plugin_info = self.send_plugin_info_request()
-                    self._plugin_name = self._plugin_info.plugin_name
-                    self._plugin_pkg_name = self._plugin_name.split('.')[0]
-                    self._msg_pkg_name = self._plugin_info.msg_pkg
-
-                    self._node.get_logger().info("setting plugin: " + self._plugin_name)
-                    self._node.get_logger().info("setting plugin pkg: " + self._plugin_pkg_name)
-                    self._node.get_logger().info("setting msg pkg: " + self._msg_pkg_name)
-
-                    self.msg_pkg_label.setText(self._msg_pkg_name)
-                    self.plugin_name_label.setText(self._plugin_name)
-
-            if self._plugin_info is not None:
-                if self.get_message_info_client.wait_for_service(timeout_sec=1.0):
-                    r = self.send_get_message_info_request()
-                    if r:
-                        self._connected_to_bridge = True
-                        self._node.get_logger().info("setting msg info with: "
-                                                     + str(len(r.msg_info)) + " messages")
-                        self._msg_dict = self._dictionary_info.init(self._plugin_pkg_name,
-                                                                    self._msg_pkg_name,
-                                                                    r.msg_info)
-                        if self._msg_dict:
-                            self.build_dictionary_tree(self._msg_dict)
-
-    def is_primitive(self, t):
-        return t in ["int8", "int16", "int32", "uint8", "uint16", "uint32",
-                     "float8", "float16", "float32", "bool", "string"]
-
-    def build_dictionary_tree(self, data):
+    def apply_search_filter(self):
+        query = self.search_edit.text().strip()
+        for bridge in self._bridges.values():
+            if not bridge.msg_dict:
+                continue
+            names = None
+            if query:
+                # a search index still being built is not waited for: the bridge keeps its
+                # current filter until on_indexes_ready
+                names = bridge.dictionary_info.search(query, wait=False)
+                if names is None:
+                    continue
+            self._msg_tree_model.set_name_filter(names, bridge.namespace)
+        self.expand_categories()
+
+    def current_msg_ref(self):
+        # (bridge, msg_name) of the selected message, (None, "") if there is none
+        namespace, msg_name = self._msg_tree_model.message_ref(self.msg_tree_widget.currentIndex())
+        return self._bridges.get(namespace), msg_name
+
+    def struct_layout(self, bridge, msg_type):
+        # rows shown for one level of a type, memoized per type until the next reload
+        layout = bridge.struct_layouts.get(msg_type)
+        if layout is not None:
+            return layout
+
+        rows = []
+        type_layout = bridge.dictionary_info.packet_layout.type_layout(msg_type)
+        field_layouts = type_layout.fields if type_layout is not None else ()
+        for (key, dk), field_layout in zip(bridge.dictionary_info.get_message_fields(msg_type),
+                                           field_layouts):
+            # 'sequence<cfe_msgs/Foo, 4>' is shown as 'key[<=4]' of type 'cfe_msgs/Foo'
+            element, suffix = unwrap_collections(parse_type(dk))
+            child_type = bridge.dictionary_info.resolve_type(element)
+            rows.append((key + suffix, str(element), child_type,
+                         format_size(field_layout.size, field_layout.max_size),
+                         field_layout.offset))
+
+        layout = tuple(rows)
+        bridge.struct_layouts[msg_type] = layout
+        return layout
+
+    def build_struct_items(self, bridge, msg_type, path):
+        # nested types are only expanded when their row is opened, see
+        # on_struct_item_expanded; path holds the enclosing types to catch cycles
         items = []
-        for key, values in data.items():
-            item = QTreeWidgetItem([key])
-            for value in values:
-                ext = value.split(".")[-1].upper()
-                child = QTreeWidgetItem([value, ext])
-                item.addChild(child)
+        for label, type_text, child_type, size_text, offset in \
+                self.struct_layout(bridge, msg_type):
+            item = QTreeWidgetItem([label, type_text, size_text])
+            if offset is not None:
+                item.setToolTip(self._column_index['size'], "offset " + str(offset))
+            if child_type is not None:
+                item.setData(0, self._struct_ref_role, child_type)
+                if child_type in path:
+                    item.setText(self._column_index['type'], type_text + " (recursive)")
+                elif bridge.dictionary_info.get_message_fields(child_type):
+                    item.setData(0, self._struct_type_role, child_type)
+                    item.setData(0, self._struct_path_role, path + (child_type,))
+                    item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
             items.append(item)
+        return items
 
-        self.msg_tree_widget.clear()
-        self.msg_tree_widget.insertTopLevelItems(0, items)
-        self.msg_tree_widget.expandAll()
-
-    def build_msg_struct_tree(self, data, par=None):
-        items = []
-        item = None
-
-        if len(data) == 0:
+    def build_msg_struct_tree(self, bridge, msg_name):
+        with self._stats.timer('tree.build_msg_struct_tree'):
+            items = self.build_struct_items(bridge, msg_name, (msg_name,))
+            self.msg_struct_tree.insertTopLevelItems(0, items)
             return items
 
-        data = ast.literal_eval(data)
-        for key in data.keys():
-
-            if par is None:
-                item = QTreeWidgetItem([key])
-            else:
-                item = QTreeWidgetItem([key, par])
-
-            dk = data[key]
-
-            if "sequence" in data[key]:
-                item.setText(self._column_index['structure'], (key + "[]"))
-                dk = dk[9:len(dk)-1]
-                item.setText(self._column_index['type'], dk)
+    @Slot(QTreeWidgetItem)
+    def on_struct_item_expanded(self, item):
+        with self._stats.timer('tree.expand_struct_item'):
+            if item.childCount() > 0 or self._current is None:
+                return
+            child_type = item.data(0, self._struct_type_role)
+            if child_type is None:
+                return
+            path = tuple(item.data(0, self._struct_path_role))
+            item.addChildren(self.build_struct_items(self._current, child_type, path))
+            item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+
+    @QtCore.pyqtSlot(QtCore.QModelIndex)
+    def on_msg_item_clicked(self, index):
+        with self._stats.timer('tree.on_msg_item_clicked'):
+            self.msg_struct_tree.clear()
+
+            namespace, t = self._msg_tree_model.message_ref(index)
+            bridge = self._bridges.get(namespace)
+            if bridge is None:
+                return
+            self._current = bridge
+            self.update_plugin_labels()
+            dictionary_info = bridge.dictionary_info
+
+            msg_name = ""
+            if dictionary_info.has_message(t):
+                msg_name = t
+
+            msg_name_item = QTableWidgetItem()
+            msg_name_item.setText(msg_name)
+            self.msg_table_header.setItem(0, 0, msg_name_item)
+
+            msg_pkg_name_item = QTableWidgetItem()
+            msg_pkg_name_item.setText(bridge.msg_pkg_name)
+            self.msg_table_header.setItem(1, 0, msg_pkg_name_item)
+
+            msg_type_item = QTableWidgetItem()
+            msg_type_item.setText(dictionary_info.get_message_type(msg_name))
+            self.msg_table_header.setItem(2, 0, msg_type_item)
+
+            info_str = dictionary_info.get_message_info(msg_name)
+            if info_str is None:
+                t = dictionary_info.get_message_type(msg_name)
+                info_str = "This is info about " + t + " msg: " + msg_name
+                self.msg_info_text.setText(info_str)
             else:
-                item.setText(self._column_index['structure'], key)
-                item.setText(self._column_index['type'], dk)
-
-            if not self.is_primitive(dk):
-                pkg_name = ""
-                s = dk.split("/")
-                if len(s) == 2:
-                    [pkg_name, msg_type] = s
-                else:
-                    msg_type = dk
-
-                m = self._dictionary_info.get_message_struct(msg_type)
-
-                children = self.build_msg_struct_tree(m, dk)
-                for c in children:
-                    item.addChild(c)
-
-            items.append(item)
-
-        if par is None:
-            self.msg_struct_tree.insertTopLevelItems(0, items)
-
-        return items
-
-    @QtCore.pyqtSlot(QtWidgets.QTreeWidgetItem, int)
-    def on_msg_item_clicked(self, it, col):
-        self.msg_struct_tree.clear()
-
-        msg_name = ""
-        t = it.text(col)
-        if any(t in sublist for sublist in self._msg_dict.values()):
-            msg_name = t
+                self.msg_info_text.setText(info_str)
 
-        msg_name_item = QTableWidgetItem()
-        msg_name_item.setText(msg_name)
-        self.msg_table_header.setItem(0, 0, msg_name_item)
+            self._node.get_logger().info("info_str: " + info_str)
+            self.build_msg_struct_tree(bridge, msg_name)
+            self.msg_struct_tree.resizeColumnToContents(0)
+            return
+
+    @QtCore.pyqtSlot(QtCore.QPoint)
+    def on_msg_tree_context_menu(self, pos):
+        index = self.msg_tree_widget.indexAt(pos)
+        namespace, msg_name = self._msg_tree_model.message_ref(index)
+        bridge = self._bridges.get(namespace)
+        if bridge is not None and msg_name:
+            self.exec_message_menu(self.msg_tree_widget, pos, bridge, msg_name)
+
+    @QtCore.pyqtSlot(QtCore.QPoint)
+    def on_struct_tree_context_menu(self, pos):
+        item = self.msg_struct_tree.itemAt(pos)
+        if item is None or self._current is None:
+            return
+        type_name = item.data(0, self._struct_ref_role)
+        if type_name is not None:
+            self.exec_type_usage_menu(self.msg_struct_tree, pos, self._current, type_name)
+
+    def exec_type_usage_menu(self, view, pos, bridge, type_name):
+        menu = QMenu(self)
+        action = menu.addAction("Show type usage of '" + type_name + "'")
+        if menu.exec_(view.viewport().mapToGlobal(pos)) is action:
+            self.show_type_usage(bridge, type_name)
+
+    def exec_message_menu(self, view, pos, bridge, msg_name):
+        # type usage plus the saved versions of the message's info, newest first
+        menu = QMenu(self)
+        usage_action = menu.addAction("Show type usage of '" + msg_name + "'")
+        history = self._store.info_history(bridge, msg_name)
+        revert_menu = menu.addMenu("Revert info to")
+        revert_menu.setEnabled(bool(history))
+        for entry in reversed(history):
+            text = ("version " + str(entry.version) + ", "
+                    + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.time)))
+            if not entry.committed:
+                text += " (uncommitted)"
+            action = revert_menu.addAction(text)
+            action.setToolTip(entry.info)
+            action.setData(entry.version)
+        action = menu.exec_(view.viewport().mapToGlobal(pos))
+        if action is usage_action:
+            self.show_type_usage(bridge, msg_name)
+        elif action is not None and action.data() is not None:
+            self.revert_info(bridge, msg_name, action.data())
+
+    def revert_info(self, bridge, msg_name, version):
+        info = self._store.revert_message_info(bridge, msg_name, version)
+        if info is not None and self.current_msg_ref() == (bridge, msg_name):
+            self.msg_info_text.setText(info)
+
+    def show_type_usage(self, bridge, type_name):
+        with self._stats.timer('tree.show_type_usage'):
+            dlg = TypeUsageDialog(type_name, bridge.dictionary_info.type_usage, self)
+        dlg.exec()
+
+    def snapshot_bridge(self):
+        # the bridge of the selected message, or the first one with a dictionary
+        if self._current is not None and self._current.msg_dict:
+            return self._current
+        return next((b for b in self._bridges.values() if b.msg_dict), None)
 
-        msg_pkg_name_item = QTableWidgetItem()
-        msg_pkg_name_item.setText(self._msg_pkg_name)
-        self.msg_table_header.setItem(1, 0, msg_pkg_name_item)
+    @QtCore.pyqtSlot()
+    def export_snapshot_pressed(self):
+        bridge = self.snapshot_bridge()
+        if bridge is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Snapshot",
+                                              bridge.plugin_pkg_name + ".json.gz",
+                                              "Dictionary snapshots (*.json.gz)")
+        if not path:
+            return
+        # fingerprinting and writing a large dictionary take a while, like the docs export
+        self.export_snapshot_button.setEnabled(False)
+        threading.Thread(target=self.export_snapshot,
+                         args=(path, bridge.dictionary_info.snapshot()), daemon=True).start()
+
+    def export_snapshot(self, path, dictionary_info):
+        error = ""
+        try:
+            with self._stats.timer('snapshot.export'):
+                save_snapshot(path, snapshot_dictionary(dictionary_info))
+        except OSError as e:
+            error = str(e)
+        self.snapshot_exported.emit(path, error)
+
+    @Slot(str, str)
+    def on_snapshot_exported(self, path, error):
+        self.export_snapshot_button.setEnabled(True)
+        if error:
+            QMessageBox.warning(self, "Export Snapshot", "Could not save snapshot: " + error)
 
-        msg_type_item = QTableWidgetItem()
-        msg_type_item.setText(self._dictionary_info.get_message_type(msg_name))
-        self.msg_table_header.setItem(2, 0, msg_type_item)
+    @QtCore.pyqtSlot()
+    def compare_snapshot_pressed(self):
+        bridge = self.snapshot_bridge()
+        if bridge is None:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Compare Snapshot", "",
+                                              "Dictionary snapshots (*.json.gz)")
+        if not path:
+            return
+        title = "Changes in " + bridge.namespace + " since " + os.path.basename(path)
+        self.compare_snapshot_button.setEnabled(False)
+        threading.Thread(target=self.compare_snapshot,
+                         args=(path, title, bridge.dictionary_info.snapshot()),
+                         daemon=True).start()
+
+    def compare_snapshot(self, path, title, dictionary_info):
+        try:
+            old = load_snapshot(path)
+        except (OSError, ValueError) as e:
+            self.snapshot_compared.emit(title, None, str(e))
+            return
+        with self._stats.timer('snapshot.diff'):
+            diff = diff_snapshots(old, snapshot_dictionary(dictionary_info))
+        self.snapshot_compared.emit(title, diff, "")
+
+    @Slot(str, object, str)
+    def on_snapshot_compared(self, title, diff, error):
+        self.compare_snapshot_button.setEnabled(True)
+        if error:
+            QMessageBox.warning(self, "Compare Snapshot", "Could not read snapshot: " + error)
+            return
+        SchemaDiffDialog(title, diff, self).exec()
 
-        info_str = self._dictionary_info.get_message_info(msg_name)
-        if info_str is None:
-            t = self._dictionary_info.get_message_type(msg_name)
-            info_str = "This is info about " + t + " msg: " + msg_name
-            self.msg_info_text.setText(info_str)
+    @QtCore.pyqtSlot()
+    def export_docs_pressed(self):
+        bridge = self.snapshot_bridge()
+        if bridge is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Docs",
+                                              bridge.plugin_pkg_name + ".md",
+                                              "Markdown (*.md);;HTML (*.html)")
+        if not path:
+            return
+        # rendering a large dictionary takes a while, so it is written off the GUI thread,
+        # from a snapshot with a packet layout of its own
+        self.export_docs_button.setEnabled(False)
+        threading.Thread(target=self.export_docs,
+                         args=(path, bridge.dictionary_info.snapshot()), daemon=True).start()
+
+    def export_docs(self, path, dictionary_info):
+        error = ""
+        try:
+            with self._stats.timer('docs.export'):
+                write_documentation(path, dictionary_info)
+        except (OSError, ValueError) as e:
+            error = str(e)
+        self.docs_exported.emit(path, error)
+
+    @Slot(str, str)
+    def on_docs_exported(self, path, error):
+        self.export_docs_button.setEnabled(True)
+        if error:
+            QMessageBox.warning(self, "Export Docs", "Could not export docs: " + error)
         else:
-            self.msg_info_text.setText(info_str)
-
-        self._node.get_logger().info("info_str: " + info_str)
-        s = self._dictionary_info.get_message_struct(msg_name)
-        self.build_msg_struct_tree(s)
-        self.msg_struct_tree.resizeColumnToContents(0)
-        return
+            self._node.get_logger().info("exported dictionary docs to " + path)
 
     @QtCore.pyqtSlot()
     def clear_info_pressed(self):
-        item = self.msg_tree_widget.currentItem().text(0)
+        bridge, item = self.current_msg_ref()
+        if not item:
+            return
         dialog_str = "Really clear message info for \'" + str(item) + "\'?"
         dlg = ConfirmDialog(dialog_str, self)
         if dlg.exec():
-            t = self._dictionary_info.get_message_type(item)
+            t = bridge.dictionary_info.get_message_type(item)
             info_str = "This is info about " + t + " msg: " + str(item)
             self.msg_info_text.setText(info_str)
         return
 
     @QtCore.pyqtSlot()
     def save_info_pressed(self):
-        item = self.msg_tree_widget.currentItem().text(0)
-        dialog_str = "Really save message info for \'" + str(item) + "\'?"
+        bridge, item = self.current_msg_ref()
+        if not item:
+            return
+        info = self.msg_info_text.toPlainText()
+        self._store.save_message_info(bridge, str(item), info)
+        return
+
+    @QtCore.pyqtSlot()
+    def commit_info_pressed(self):
+        n = sum(b.edit_queue.pending_count() for b in self._bridges.values())
+        dialog_str = "Really commit message info for " + str(n) + " message(s) to the bridge?"
         dlg = ConfirmDialog(dialog_str, self)
-        if dlg.exec():
-            info = self.msg_info_text.toPlainText()
-            self._dictionary_info.save_message_info(str(item), info)
-            r = self.send_set_message_info_request(str(item), info)
-            if not r:
-                self._node.get_logger().error("problem saving info for: " + str(item))
+        if not dlg.exec():
+            return
+        # every bridge commits its own queue; progress is summed over all of them
+        for bridge in self._bridges.values():
+            total = bridge.edit_queue.pending_count()
+            if bridge.edit_queue.flush(bridge.msg_pkg_name):
+                self._commit_progress[bridge.namespace] = (0, total)
+        if self._commit_progress:
+            self.commit_info_button.setEnabled(False)
+            self.commit_progress_bar.setRange(0, n)
+            self.commit_progress_bar.setValue(0)
+            self.commit_progress_bar.setVisible(True)
         return
 
+    @Slot(str, str)
+    def on_info_changed(self, namespace, msg_name):
+        if namespace in self._bridges:
+            self.update_pending_edits()
+
+    @Slot(str, int, int)
+    def on_commit_progress(self, namespace, done, total):
+        # only commits started from this view show their progress here
+        if namespace not in self._commit_progress:
+            return
+        self._commit_progress[namespace] = (done, total)
+        self.commit_progress_bar.setRange(0, sum(t for _, t in self._commit_progress.values()))
+        self.commit_progress_bar.setValue(sum(d for d, _ in self._commit_progress.values()))
+
+    @Slot(str, object)
+    def on_commit_finished(self, namespace, failed):
+        if namespace not in self._bridges:
+            return
+        self._commit_progress.pop(namespace, None)
+        if not self._commit_progress:
+            self.commit_progress_bar.setVisible(False)
+        for msg_name in failed:
+            self._node.get_logger().error("problem saving info for: " + msg_name
+                                          + " on " + namespace)
+        self.update_pending_edits()
+
+    def update_pending_edits(self):
+        n = sum(b.edit_queue.pending_count() for b in self._bridges.values())
+        flushing = any(b.edit_queue.is_flushing() for b in self._bridges.values())
+        self.pending_edits_label.setText(str(n) + " uncommitted" if n else "")
+        self.commit_info_button.setEnabled(n > 0 and not flushing)
+
     @QtCore.pyqtSlot()
     def reload_info_pressed(self):
-        item = self.msg_tree_widget.currentItem().text(0)
+        bridge, item = self.current_msg_ref()
+        if not item:
+            return
         dialog_str = "Really reload message info for \'" + str(item) + "\'?"
         dlg = ConfirmDialog(dialog_str, self)
         if dlg.exec():
-            stored_info = self._dictionary_info.get_message_info(str(item))
+            stored_info = bridge.dictionary_info.get_message_info(str(item))
             if stored_info is None:
-                t = self._dictionary_info.get_message_type(item)
+                t = bridge.dictionary_info.get_message_type(item)
                 info_str = "This is info about " + t + " msg: " + str(item)
                 self.msg_info_text.setText(info_str)
             else:
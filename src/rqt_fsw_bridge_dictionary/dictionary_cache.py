@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+
+CACHE_FORMAT_VERSION = 1
+
+# same attributes as fsw_ros2_bridge_msgs/MessageInfo, so DictionaryInfo.init accepts either
+CachedMessageInfo = namedtuple('CachedMessageInfo', ['msg_name', 'msg_type', 'json', 'info'])
+
+DictionaryCache = namedtuple('DictionaryCache', ['plugin_name', 'msg_pkg', 'digest', 'messages'])
+
+
+def default_cache_dir():
+    ros_home = os.environ.get('ROS_HOME', os.path.join(os.path.expanduser('~'), '.ros'))
+    return os.path.join(ros_home, 'rqt_fsw_bridge_dictionary')
+
+
+def cache_path(namespace, plugin_name, msg_pkg, cache_dir=None):
+    # one cache per bridge, keyed like the info journal of the bridge
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    key = re.sub(r'[^A-Za-z0-9_.-]', '_',
+                 namespace.strip('/') + '__' + plugin_name + '__' + msg_pkg)
+    return os.path.join(cache_dir, key + '.json.gz')
+
+
+def content_hash(message_info_list):
+    h = hashlib.sha256()
+    for m in message_info_list:
+        for field in (m.msg_name, str(m.msg_type), m.json, m.info):
+            h.update(field.encode('utf-8'))
+            h.update(b'\0')
+    return h.hexdigest()
+
+
+def save_dictionary_cache(path, plugin_name, msg_pkg, message_info_list, digest=None):
+    if digest is None:
+        digest = content_hash(message_info_list)
+    doc = {
+        'version': CACHE_FORMAT_VERSION,
+        'plugin_name': plugin_name,
+        'msg_pkg': msg_pkg,
+        'digest': digest,
+        'messages': [[m.msg_name, m.msg_type, m.json, m.info] for m in message_info_list],
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write to a temporary file first so a crash never leaves a truncated cache behind
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        json.dump(doc, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return digest
+
+
+def load_dictionary_cache(path):
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if doc.get('version') != CACHE_FORMAT_VERSION:
+        return None
+    messages = [CachedMessageInfo(*m) for m in doc['messages']]
+    return DictionaryCache(doc['plugin_name'], doc['msg_pkg'], doc['digest'], messages)
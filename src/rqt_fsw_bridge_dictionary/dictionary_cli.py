@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+# Headless access to the FSW bridge dictionary. Nothing on this path may import Qt or rqt:
+# it only uses the bridge client and DictionaryInfo.
+
+import argparse
+import csv
+import fnmatch
+import json
+import sys
+import time
+
+import rclpy
+from rclpy.utilities import remove_ros_args
+
+from .bridge_client import BridgeClient, DEFAULT_BRIDGE_NAMESPACE
+from .dictionary_docs import DOC_FORMATS, doc_format_for_path, iter_documentation
+from .dictionary_info import DictionaryInfo
+from .dictionary_snapshot import load_snapshot, save_snapshot, snapshot_dictionary
+from .dictionary_snapshot import snapshot_message_infos
+from .schema_diff import diff_snapshots, diff_to_dict, format_diff
+
+
+EXPORT_FIELDS = ['name', 'type', 'pkg', 'info', 'json']
+
+_KINDS = {'command': 'COMMAND', 'telemetry': 'TELEMETRY', 'helper': 'HELPER'}
+
+
+def _wait_for_response(node, request, timeout_sec):
+    # BridgeClient always calls back, with None on timeout, so this loop terminates
+    responses = []
+    request(responses.append, timeout_sec=timeout_sec)
+    while not responses:
+        rclpy.spin_once(node, timeout_sec=0.1)
+    return responses[0]
+
+
+def fetch_dictionary(node, namespace=DEFAULT_BRIDGE_NAMESPACE, timeout_sec=30.0):
+    client = BridgeClient(node, namespace)
+    logger = node.get_logger()
+    try:
+        deadline = time.monotonic() + timeout_sec
+        for service in [client.plugin_info_client, client.get_message_info_client]:
+            if not service.wait_for_service(timeout_sec=max(0.0, deadline - time.monotonic())):
+                logger.error("bridge service not available: " + service.srv_name)
+                return None
+
+        plugin_info = _wait_for_response(node, client.request_plugin_info, timeout_sec)
+        if plugin_info is None:
+            logger.error("no plugin info from bridge at " + namespace)
+            return None
+        r = _wait_for_response(node, client.request_message_info, timeout_sec)
+        if not r:
+            logger.error("no message info from bridge at " + namespace)
+            return None
+
+        dictionary_info = DictionaryInfo(node)
+        dictionary_info.init(plugin_info.plugin_name.split('.')[0], plugin_info.msg_pkg,
+                             r.msg_info)
+        return dictionary_info
+    finally:
+        client.shutdown()
+
+
+def iter_records(dictionary_info, name_patterns=(), kinds=()):
+    for name, kind, struct, info in dictionary_info.iter_messages():
+        if kinds and kind not in kinds:
+            continue
+        if name_patterns and not any(fnmatch.fnmatchcase(name, p) for p in name_patterns):
+            continue
+        yield {'name': name, 'type': kind, 'pkg': dictionary_info.msg_pkg,
+               'info': info, 'json': struct}
+
+
+def write_jsonl(records, out):
+    for record in records:
+        out.write(json.dumps(record))
+        out.write('\n')
+
+
+def write_csv(records, out):
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+
+
+def _open_output(path):
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def export_command(node, args):
+    dictionary_info = fetch_dictionary(node, args.namespace, args.timeout)
+    if dictionary_info is None:
+        return 1
+    kinds = [_KINDS[k] for k in args.type]
+    records = iter_records(dictionary_info, args.name, kinds)
+    out = _open_output(args.output)
+    try:
+        if args.format == 'csv':
+            write_csv(records, out)
+        else:
+            write_jsonl(records, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def snapshot_command(node, args):
+    dictionary_info = fetch_dictionary(node, args.namespace, args.timeout)
+    if dictionary_info is None:
+        return 1
+    save_snapshot(args.output, snapshot_dictionary(dictionary_info))
+    return 0
+
+
+def diff_command(node, args):
+    # diff(1) exit status: 0 when the dictionaries match, 1 when they differ, 2 on error
+    try:
+        old = load_snapshot(args.old)
+        if args.new is not None:
+            new = load_snapshot(args.new)
+        else:
+            dictionary_info = fetch_dictionary(node, args.namespace, args.timeout)
+            if dictionary_info is None:
+                return 2
+            new = snapshot_dictionary(dictionary_info)
+    except (OSError, ValueError) as e:
+        node.get_logger().error("could not read snapshot: " + str(e))
+        return 2
+
+    diff = diff_snapshots(old, new)
+    out = _open_output(args.output)
+    try:
+        if args.format == 'json':
+            json.dump(diff_to_dict(diff), out, indent=2)
+            out.write('\n')
+        else:
+            for line in format_diff(diff):
+                out.write(line + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if diff.added or diff.removed or diff.changed else 0
+
+
+def docs_command(node, args):
+    if args.snapshot is not None:
+        try:
+            snapshot = load_snapshot(args.snapshot)
+        except (OSError, ValueError) as e:
+            node.get_logger().error("could not read snapshot: " + str(e))
+            return 1
+        dictionary_info = DictionaryInfo(node)
+        dictionary_info.init(snapshot.plugin_pkg, snapshot.msg_pkg,
+                             snapshot_message_infos(snapshot))
+    else:
+        dictionary_info = fetch_dictionary(node, args.namespace, args.timeout)
+        if dictionary_info is None:
+            return 1
+    fmt = args.format
+    if fmt is None:
+        fmt = doc_format_for_path(args.output)
+    out = _open_output(args.output)
+    try:
+        for text in iter_documentation(dictionary_info, fmt, args.jobs):
+            out.write(text)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='fsw_bridge_dictionary',
+        description='Query the FSW ROS2 bridge dictionary without a display.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    export = subparsers.add_parser('export', help='stream the dictionary as JSON Lines or CSV')
+    export.add_argument('--namespace', default=DEFAULT_BRIDGE_NAMESPACE,
+                        help='namespace of the bridge services (default: %(default)s)')
+    export.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    export.add_argument('--name', action='append', default=[], metavar='PATTERN',
+                        help='only messages whose name matches this glob (repeatable)')
+    export.add_argument('--type', action='append', default=[], choices=sorted(_KINDS),
+                        help='only messages of this type (repeatable)')
+    export.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    export.add_argument('--timeout', type=float, default=30.0,
+                        help='seconds to wait for the bridge (default: %(default)s)')
+    export.set_defaults(func=export_command)
+
+    snapshot = subparsers.add_parser('snapshot',
+                                     help='save the dictionary structure to a snapshot file')
+    snapshot.add_argument('--namespace', default=DEFAULT_BRIDGE_NAMESPACE,
+                          help='namespace of the bridge services (default: %(default)s)')
+    snapshot.add_argument('-o', '--output', required=True, help='snapshot file (.json.gz)')
+    snapshot.add_argument('--timeout', type=float, default=30.0,
+                          help='seconds to wait for the bridge (default: %(default)s)')
+    snapshot.set_defaults(func=snapshot_command)
+
+    diff = subparsers.add_parser(
+        'diff', help='list added, removed and changed messages between two snapshots',
+        description='Compare two snapshots, or a snapshot with the running bridge when NEW '
+                    'is left out. Exits with 0 when they match, 1 when they differ and 2 '
+                    'on error.')
+    diff.add_argument('old', help='snapshot file')
+    diff.add_argument('new', nargs='?', help='snapshot file (default: the running bridge)')
+    diff.add_argument('--namespace', default=DEFAULT_BRIDGE_NAMESPACE,
+                      help='namespace of the bridge services (default: %(default)s)')
+    diff.add_argument('--format', choices=['text', 'json'], default='text')
+    diff.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    diff.add_argument('--timeout', type=float, default=30.0,
+                      help='seconds to wait for the bridge (default: %(default)s)')
+    diff.set_defaults(func=diff_command)
+
+    docs = subparsers.add_parser(
+        'docs', help='render every message to a Markdown or HTML reference document')
+    docs.add_argument('--namespace', default=DEFAULT_BRIDGE_NAMESPACE,
+                      help='namespace of the bridge services (default: %(default)s)')
+    docs.add_argument('--snapshot', metavar='FILE',
+                      help='document this snapshot file instead of the running bridge')
+    docs.add_argument('--format', choices=DOC_FORMATS,
+                      help='default: html for an .html output file, markdown otherwise')
+    docs.add_argument('-j', '--jobs', type=int,
+                      help='rendering processes (default: one per CPU)')
+    docs.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    docs.add_argument('--timeout', type=float, default=30.0,
+                      help='seconds to wait for the bridge (default: %(default)s)')
+    docs.set_defaults(func=docs_command)
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    args = build_parser().parse_args(remove_ros_args(argv)[1:])
+
+    rclpy.init(args=argv)
+    node = rclpy.create_node('fsw_bridge_dictionary_cli')
+    try:
+        return args.func(node, args)
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+# Markdown and HTML reference documentation of a whole dictionary. Used by the widget and
+# the command line tool, so nothing here may import Qt or rqt.
+
+import html
+import multiprocessing
+import os
+from collections import deque
+
+from .dictionary_info import parse_struct_items
+from .packet_layout import format_size
+from .type_expr import parse_type, resolve_message, unwrap_collections
+
+
+DOC_FORMATS = ['markdown', 'html']
+
+_CATEGORIES = [("commands", "Commands"), ("telemetry", "Telemetry"), ("helper", "Helper types")]
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; }}
+table {{ border-collapse: collapse; margin-bottom: 1em; }}
+th, td {{ border: 1px solid #ccc; padding: 2px 8px; text-align: left; }}
+td.field {{ font-family: monospace; }}
+</style>
+</head>
+<body>
+"""
+
+
+def doc_format_for_path(path):
+    return 'html' if path.lower().endswith(('.html', '.htm')) else 'markdown'
+
+
+class DocRenderer:
+    """Renders the section of one message: its header table, info text and field tree.
+
+    Nested types are expanded in place, their fields shown by path, e.g.
+    ``header.seq``, down to ``max_depth`` levels; a type inside itself is marked as
+    recursive and not expanded again. The fields of every type are parsed once, and
+    the expanded rows of every type outside a cycle are rendered once, since they
+    are the same wherever the type is used.
+    """
+
+    def __init__(self, structs, msg_pkg, fmt='markdown', max_depth=16):
+        self._structs = structs
+        self._msg_pkg = msg_pkg
+        self._html = fmt == 'html'
+        self._max_depth = max_depth
+        self._fields = {}
+        self._subtrees = {}
+
+    def fields(self, type_name):
+        # [(label, type text, nested message or None)], as in the struct tree of the widget
+        rows = self._fields.get(type_name)
+        if rows is None:
+            rows = []
+            for key, type_text in parse_struct_items(self._structs.get(type_name)):
+                element, suffix = unwrap_collections(parse_type(type_text))
+                rows.append((key + suffix, str(element),
+                             resolve_message(element, self._msg_pkg, self._structs)))
+            self._fields[type_name] = rows
+        return rows
+
+    def field_rows(self, type_name):
+        # [(field path, rendered type cell)] of the expanded field tree, both escaped
+        rows, _ = self._expand(type_name, (type_name,), self._max_depth)
+        return rows
+
+    def _expand(self, type_name, path, depth):
+        # also returns whether the rows are the same on any path: a type whose
+        # expansion meets no type of its path is not on a cycle
+        rows = self._subtrees.get((type_name, depth))
+        if rows is not None:
+            return rows, True
+        rows = []
+        acyclic = True
+        for label, type_text, child in self.fields(type_name):
+            recursive = child is not None and child in path
+            if self._html:
+                label = html.escape(label)
+            rows.append((label, self._type_cell(type_text, child, recursive)))
+            if recursive:
+                acyclic = False
+            elif child is not None and depth > 1:
+                child_rows, child_acyclic = self._expand(child, path + (child,), depth - 1)
+                acyclic = acyclic and child_acyclic
+                prefix = label + "."
+                rows.extend((prefix + field, cell) for field, cell in child_rows)
+        if acyclic and len(path) > 1:
+            self._subtrees[(type_name, depth)] = rows
+        return rows, acyclic
+
+    def _type_cell(self, type_text, child, recursive):
+        if self._html:
+            cell = html.escape(type_text)
+            if child is not None:
+                cell = '<a href="#msg-' + html.escape(child) + '">' + cell + '</a>'
+        else:
+            cell = _md_cell(type_text)
+            if child is not None:
+                cell = '[' + cell + '](#msg-' + child + ')'
+        return cell + ' (recursive)' if recursive else cell
+
+    def render(self, name, kind, info, size_text):
+        if self._html:
+            return self._render_html(name, kind, info, size_text)
+        return self._render_markdown(name, kind, info, size_text)
+
+    def _render_markdown(self, name, kind, info, size_text):
+        out = ['<a id="msg-', name, '"></a>\n\n### ', name, '\n\n',
+               '| | |\n|---|---|\n',
+               '| name | ', name, ' |\n',
+               '| package | ', _md_cell(self._msg_pkg), ' |\n',
+               '| type | ', kind, ' |\n',
+               '| size | ', size_text, ' |\n\n']
+        if info:
+            out += [info.strip(), '\n\n']
+        rows = self.field_rows(name)
+        if rows:
+            out.append('| field | type |\n|---|---|\n')
+            out += ['| `' + field + '` | ' + cell + ' |\n' for field, cell in rows]
+            out.append('\n')
+        return ''.join(out)
+
+    def _render_html(self, name, kind, info, size_text):
+        out = ['<h3 id="msg-', html.escape(name), '">', html.escape(name), '</h3>\n<table>\n',
+               '<tr><th>name</th><td>', html.escape(name), '</td></tr>\n',
+               '<tr><th>package</th><td>', html.escape(self._msg_pkg), '</td></tr>\n',
+               '<tr><th>type</th><td>', kind, '</td></tr>\n',
+               '<tr><th>size</th><td>', html.escape(size_text), '</td></tr>\n</table>\n']
+        if info:
+            out += ['<p>', html.escape(info.strip()).replace('\n', '<br>\n'), '</p>\n']
+        rows = self.field_rows(name)
+        if rows:
+            out.append('<table>\n<tr><th>field</th><th>type</th></tr>\n')
+            out += ['<tr><td class="field">' + field + '</td><td>' + cell
+                    + '</td></tr>\n' for field, cell in rows]
+            out.append('</table>\n')
+        return ''.join(out)
+
+
+def _md_cell(text):
+    return text.replace('|', '\\|').replace('\n', '<br>')
+
+
+# the renderer of a pool worker, set up once per process
+_worker_renderer = None
+
+
+def _init_worker(structs, msg_pkg, fmt, max_depth):
+    global _worker_renderer
+    _worker_renderer = DocRenderer(structs, msg_pkg, fmt, max_depth)
+
+
+def _render_chunk(chunk):
+    return ''.join(_worker_renderer.render(*m) for m in chunk)
+
+
+def _document_parts(dictionary_info, fmt, chunk_size):
+    # literal text and chunks of (name, kind, info, size text) to render, in document order
+    title = (dictionary_info.plugin_pkg or dictionary_info.msg_pkg) + " dictionary"
+    summary = (str(dictionary_info.message_count()) + " messages in package "
+               + dictionary_info.msg_pkg)
+    if fmt == 'html':
+        yield _HTML_HEAD.format(title=html.escape(title))
+        yield '<h1>' + html.escape(title) + '</h1>\n<p>' + html.escape(summary) + '</p>\n'
+    else:
+        yield '# ' + title + '\n\n' + summary + '\n\n'
+
+    packet_layout = dictionary_info.packet_layout
+    msg_dict = dictionary_info.get_message_dict()
+    for category, heading in _CATEGORIES:
+        names = msg_dict[category]
+        if not names:
+            continue
+        yield ('<h2>' + heading + '</h2>\n') if fmt == 'html' else ('## ' + heading + '\n\n')
+        for start in range(0, len(names), chunk_size):
+            chunk = []
+            for name in names[start:start + chunk_size]:
+                sizes = packet_layout.type_size(name) or (None, None)
+                chunk.append((name, dictionary_info.get_message_type(name),
+                              dictionary_info.get_message_info(name), format_size(*sizes)))
+            yield chunk
+
+    if fmt == 'html':
+        yield '</body>\n</html>\n'
+
+
+def iter_documentation(dictionary_info, fmt='markdown', jobs=None, chunk_size=256,
+                       max_depth=16):
+    """Yield the documentation of a DictionaryInfo as text, in order.
+
+    Messages are rendered ``chunk_size`` at a time in a pool of ``jobs`` processes,
+    one per CPU by default; with ``jobs=1``, or a dictionary of a single chunk, they
+    are rendered in this process. Pool processes are spawned rather than forked, as
+    the caller may run other threads. At most two chunks per process are in flight and
+    every chunk is yielded as soon as it is its turn, so memory use does not grow
+    with the size of the dictionary.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    structs = {name: struct for name, _, struct, _ in dictionary_info.iter_messages()}
+    args = (structs, dictionary_info.msg_pkg, fmt, max_depth)
+    parts = _document_parts(dictionary_info, fmt, chunk_size)
+
+    if jobs <= 1 or len(structs) <= chunk_size:
+        renderer = DocRenderer(*args)
+        for part in parts:
+            if isinstance(part, str):
+                yield part
+            else:
+                yield ''.join(renderer.render(*m) for m in part)
+        return
+
+    window = 2 * jobs
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(jobs, initializer=_init_worker, initargs=args) as pool:
+        in_flight = deque()
+        for part in parts:
+            if not isinstance(part, str):
+                part = pool.apply_async(_render_chunk, (part,))
+            in_flight.append(part)
+            while len(in_flight) > window:
+                yield _part_text(in_flight.popleft())
+        while in_flight:
+            yield _part_text(in_flight.popleft())
+
+
+def _part_text(part):
+    return part if isinstance(part, str) else part.get()
+
+
+def write_documentation(path, dictionary_info, fmt=None, jobs=None):
+    # streams the documentation into path; a failed export leaves no partial file behind
+    if fmt is None:
+        fmt = doc_format_for_path(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for text in iter_documentation(dictionary_info, fmt, jobs):
+                f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
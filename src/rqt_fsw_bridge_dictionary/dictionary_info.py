@@ -1,63 +1,317 @@
 #!/usr/bin/env python3
 
-from fsw_ros2_bridge_msgs.msg import MessageInfo
+import ast
+import json
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+from .message_store import MessageStore
+from .packet_layout import PacketLayout
+from .search_index import SearchIndex
+from .type_expr import MessageType, parse_type, resolve_message
+from .type_expr import unwrap_collections
+from .type_usage import TypeUsageIndex
+
+
+# one field of a message struct, e.g. FieldDescriptor('payload', 'sequence<cfe_msgs/Foo>')
+FieldDescriptor = namedtuple('FieldDescriptor', ['name', 'type'])
+
+
+def parse_struct_items(data):
+    # [(field name, type text)] straight from the struct json, for whole-dictionary passes
+    if not data:
+        return []
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    try:
+        struct = json.loads(data)
+    except ValueError:
+        # older bridges send the python repr of the struct dict
+        struct = ast.literal_eval(data)
+    return list(struct.items())
+
+
+def parse_struct_json(data):
+    # field and type names repeat across most messages, so share one copy of each
+    return tuple(FieldDescriptor(sys.intern(k), sys.intern(v))
+                 for k, v in parse_struct_items(data))
+
+
+def _referenced_type(type_text, msg_pkg, msg_names):
+    # 'cfe_msgs/Foo' and 'sequence<cfe_msgs/Foo, 4>' -> 'Foo'; types of other packages
+    # keep their package, 'other_msgs/Foo', and primitives give None
+    t = parse_type(type_text)
+    name = resolve_message(t, msg_pkg, msg_names)
+    if name is None:
+        t, _ = unwrap_collections(t)
+        if isinstance(t, MessageType):
+            name = sys.intern(str(t))
+    return name
+
+
+_CATEGORIES = {"COMMAND": "commands", "TELEMETRY": "telemetry", "HELPER": "helper"}
 
 
 class DictionaryInfo:
-    def __init__(self, node):
+    def __init__(self, node, struct_cache_size=1024, stats=None):
         self._node = node
-        self._message_info_list = []
-        self._msg_dict = {"commands": [], "telemetry": [], "helper": []}
-        self._msg_struct = {}
-        self._msg_info = {}
+        self._stats = stats
+        self._struct_cache_size = struct_cache_size
+        self._struct_cache = OrderedDict()
+        # the category lists in _msg_dict are derived from the store
+        self._store = MessageStore()
+        self._msg_dict = None
+        self._type_usage = TypeUsageIndex()
+        self._packet_layout = None
+        self._resolved = {}
+        self._search_index = None
+        self._search_lock = threading.Lock()
+        self._search_build_lock = threading.Lock()
+        # bumped whenever the messages change, so indexes built meanwhile are dropped
+        self._generation = 0
         self._msg_pkg = ""
         self._plugin_pkg = ""
+        self._loading = None
+        self._loading_shown = False
+        self._loading_pkgs = None
 
     def init(self, plugin_pkg, msg_pkg, message_info_list):
         self._plugin_pkg = plugin_pkg
         self._msg_pkg = msg_pkg
-        self._message_info_list = message_info_list
-        return self.set_message_info()
-
-    def set_message_info(self):
-        for m in self._message_info_list:
-            if m.msg_type is MessageInfo.TELEMETRY:
-                self._msg_dict["telemetry"].append(m.msg_name)
-            elif m.msg_type is MessageInfo.COMMAND:
-                self._msg_dict["commands"].append(m.msg_name)
-            else:
-                self._msg_dict["helper"].append(m.msg_name)
-            self._msg_struct[m.msg_name] = m.json
-            self._msg_info[m.msg_name] = m.info
-
-        n_cmd = len(self._msg_dict["commands"])
-        n_tlm = len(self._msg_dict["telemetry"])
-        n_hlp = len(self._msg_dict["helper"])
+        if self._stats is None:
+            return self.set_message_info(message_info_list)
+        with self._stats.timer('dictionary_info.init'):
+            return self.set_message_info(message_info_list)
+
+    def set_message_info(self, message_info_list):
+        # only the packed store is kept, not the response messages themselves
+        self._loading = None
+        self._install_store(MessageStore(message_info_list))
+        self._type_usage = self.build_type_usage()
+        return self._log_counts()
+
+    def begin_load(self, plugin_pkg, msg_pkg):
+        # the messages then arrive in chunks through add_loaded(). A first load is
+        # shown as it grows; a reload keeps the current messages until finish_load()
+        self._loading = MessageStore()
+        self._loading_pkgs = (plugin_pkg, msg_pkg)
+        self._loading_shown = len(self._store) == 0
+        if self._loading_shown:
+            self._plugin_pkg = plugin_pkg
+            self._msg_pkg = msg_pkg
+            self._install_store(self._loading)
+
+    def add_loaded(self, part):
+        # merges a MessageStore chunk; returns whether the new messages are shown yet
+        self._loading.extend(part)
+        if self._loading_shown:
+            self._msg_dict = None
+        return self._loading_shown
+
+    def finish_load(self):
+        store = self._loading.freeze()
+        self._loading = None
+        self._plugin_pkg, self._msg_pkg = self._loading_pkgs
+        # a shown load only needs what was derived from its partial state dropped
+        self._install_store(store)
+        return self._log_counts()
+
+    def cancel_load(self):
+        # a shown load keeps the messages it got so far; returns whether it did
+        if self._loading is None:
+            return False
+        if self._loading_shown:
+            self.finish_load()
+            return True
+        self._loading = None
+        return False
+
+    def snapshot(self):
+        # a copy with caches of its own, e.g. the packet layout, which later loads and
+        # edits do not touch; for passes over the whole dictionary on a worker thread
+        copy = DictionaryInfo(self._node, self._struct_cache_size)
+        copy._store = self._store.copy()
+        copy._plugin_pkg = self._plugin_pkg
+        copy._msg_pkg = self._msg_pkg
+        copy._type_usage = self._type_usage
+        return copy
+
+    def _install_store(self, store):
+        with self._search_lock:
+            self._store = store
+            self._generation += 1
+            self._msg_dict = None
+            self._search_index = None
+            self._struct_cache.clear()
+            self._resolved = {}
+            self._type_usage = None
+            self._packet_layout = None
+
+    def _log_counts(self):
+        msg_dict = self.get_message_dict()
+        n_cmd = len(msg_dict["commands"])
+        n_tlm = len(msg_dict["telemetry"])
+        n_hlp = len(msg_dict["helper"])
 
         self._node.get_logger().info("Message Dictionary:")
         self._node.get_logger().info("  found " + str(n_cmd) + " command msgs")
         self._node.get_logger().info("  found " + str(n_tlm) + " telemetry msgs")
         self._node.get_logger().info("  found " + str(n_hlp) + " helper msgs")
+        return msg_dict
+
+    def get_message_dict(self):
+        if self._msg_dict is None:
+            store = self._store
+            self._msg_dict = {"commands": [], "telemetry": [], "helper": []}
+            for name in store.names():
+                self._msg_dict[_CATEGORIES[store.kind(name)]].append(name)
         return self._msg_dict
 
+    def build_type_usage(self):
+        # one pass over every field of every message, with a memo of its own: it may run
+        # on a worker thread while a reload resets self._resolved
+        type_usage = TypeUsageIndex()
+        store = self._store
+        msg_pkg = self._msg_pkg
+        resolved = {}
+        for name in list(store.names()):
+            used = []
+            for _, type_text in parse_struct_items(store.struct_bytes(name)):
+                ref = resolved.get(type_text, False)
+                if ref is False:
+                    ref = _referenced_type(type_text, msg_pkg, store)
+                    resolved[type_text] = ref
+                if ref is not None:
+                    used.append(ref)
+            type_usage.add_message(name, used)
+        return type_usage
+
+    def resolve_type(self, t):
+        # name of the message a parsed type (or its element type) refers to, None if the
+        # dictionary does not define it under its own package
+        name = self._resolved.get(t, False)
+        if name is False:
+            name = resolve_message(t, self._msg_pkg, self._store)
+            self._resolved[t] = name
+        return name
+
+    @property
+    def type_usage(self):
+        # built on first use after a chunked load, see SharedDictionaryStore. No lock is
+        # held while building; one built from messages replaced meanwhile is dropped
+        while True:
+            type_usage = self._type_usage
+            if type_usage is not None:
+                return type_usage
+            generation = self._generation
+            type_usage = self.build_type_usage()
+            with self._search_lock:
+                if self._generation == generation and self._type_usage is None:
+                    self._type_usage = type_usage
+
+    @property
+    def packet_layout(self):
+        # sizes are memoized per type until the next reload
+        if self._packet_layout is None:
+            self._packet_layout = PacketLayout(self)
+        return self._packet_layout
+
+    def iter_messages(self):
+        # (name, kind, struct json, info) in bridge order
+        store = self._store
+        for name in store.names():
+            yield (name, store.kind(name), store.struct_bytes(name).decode('utf-8'),
+                   store.info(name))
+
+    def has_message(self, msg_name):
+        return msg_name in self._store
+
+    def message_count(self):
+        return len(self._store)
+
+    @property
+    def msg_pkg(self):
+        return self._msg_pkg
+
+    @property
+    def plugin_pkg(self):
+        return self._plugin_pkg
+
     def get_message_type(self, msg_name):
-        if msg_name in self._msg_dict["telemetry"]:
-            return "TELEMETRY"
-        if msg_name in self._msg_dict["commands"]:
-            return "COMMAND"
-        if msg_name in self._msg_dict["helper"]:
-            return "HELPER"
-        return "UNKNOWN"
-
-    def get_message_struct(self, msg_name):
-        if msg_name in self._msg_struct.keys():
-            return self._msg_struct[msg_name]
-        return {}
+        if msg_name not in self._store:
+            return "UNKNOWN"
+        return self._store.kind(msg_name)
+
+    def get_message_fields(self, msg_name):
+        # parsed once per message, then served from a bounded LRU
+        fields = self._struct_cache.get(msg_name)
+        if fields is not None:
+            self._struct_cache.move_to_end(msg_name)
+            return fields
+        store = self._store
+        fields = parse_struct_json(store.struct_bytes(msg_name) if msg_name in store else None)
+        self._struct_cache[msg_name] = fields
+        if len(self._struct_cache) > self._struct_cache_size:
+            self._struct_cache.popitem(last=False)
+        return fields
+
+    def get_message_items(self, msg_name):
+        # uncached [(field name, type text)] for passes over the whole dictionary
+        if msg_name not in self._store:
+            return []
+        return parse_struct_items(self._store.struct_bytes(msg_name))
 
     def get_message_info(self, msg_name):
-        if msg_name in self._msg_struct.keys():
-            return self._msg_info[msg_name]
-        return ""
+        if msg_name not in self._store:
+            return ""
+        return self._store.info(msg_name)
 
     def save_message_info(self, msg_name, info):
-        self._msg_info[msg_name] = info
+        if msg_name in self._store:
+            with self._search_lock:
+                self._store.set_info(msg_name, info)
+                if self._search_index is not None:
+                    self._search_index.set_info(msg_name, info)
+
+    def build_indexes(self):
+        # for a worker thread after a chunked load; both are otherwise built on first use
+        return self.type_usage, self.build_search_index()
+
+    def build_search_index(self):
+        # safe to call from a worker thread right after a (re)load; search() builds the
+        # index itself if it is not there yet
+        with self._search_build_lock:
+            if self._search_index is not None:
+                return self._search_index
+            # read together, so an index is never installed for a store it was not built from
+            with self._search_lock:
+                store = self._store
+                generation = self._generation
+            search_index = SearchIndex()
+            for name in list(store.names()):
+                search_index.add_message(name, parse_struct_json(store.struct_bytes(name)),
+                                         store.info(name))
+            search_index.warm_up()
+            return self._install_search_index(store, generation, search_index)
+
+    def _install_search_index(self, store, generation, search_index):
+        with self._search_lock:
+            if self._generation != generation:
+                return None
+            if self._search_index is None:
+                # pick up info edits made while the index was being built
+                for name, info in store.edited_infos().items():
+                    search_index.set_info(name, info)
+                self._search_index = search_index
+            return self._search_index
+
+    def search(self, query, wait=True):
+        # matching names; with wait=False, None instead of building a missing index here
+        search_index = self._search_index
+        if search_index is None and not wait:
+            return None
+        while search_index is None:
+            search_index = self.build_search_index()
+        with self._search_lock:
+            return search_index.search(query)
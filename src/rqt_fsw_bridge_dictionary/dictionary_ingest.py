@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+from .message_store import MessageStore
+
+
+class DictionaryIngest:
+    """Packs a dictionary response into MessageStore chunks on a worker thread.
+
+    Messages are classified, interned and packed ``chunk_size`` at a time, so the
+    GUI thread only has to merge each chunk (see ``MessageStore.extend``) and can
+    show the first messages while the rest is still being packed. ``on_chunk(part,
+    done, total)`` and ``on_finished(cancelled)`` are called from the worker thread;
+    once ``cancel`` returns, no further chunk is packed.
+    """
+
+    def __init__(self, message_info_list, digest, chunk_size=2000, on_chunk=None,
+                 on_finished=None):
+        self.digest = digest
+        self.total = len(message_info_list)
+        self._message_info_list = message_info_list
+        self._chunk_size = chunk_size
+        self._on_chunk = on_chunk
+        self._on_finished = on_finished
+        self._cancelled = threading.Event()
+        self._thread = None
+        self.started_ns = 0
+
+    def start(self):
+        self.started_ns = time.perf_counter_ns()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run(self):
+        messages = self._message_info_list
+        done = 0
+        while done < self.total and not self._cancelled.is_set():
+            part = MessageStore(messages[done:done + self._chunk_size])
+            done = min(done + self._chunk_size, self.total)
+            if self._on_chunk is not None:
+                self._on_chunk(part, done, self.total)
+        # the response is not needed any more, only the packed chunks
+        self._message_info_list = None
+        if self._on_finished is not None:
+            self._on_finished(self._cancelled.is_set())
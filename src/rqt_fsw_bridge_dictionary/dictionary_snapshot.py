@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import gzip
+import json
+import os
+import time
+from collections import namedtuple
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+from .dictionary_cache import CachedMessageInfo
+from .schema_diff import structural_fingerprints
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+SnapshotMessage = namedtuple('SnapshotMessage', ['kind', 'json', 'info', 'fingerprint'])
+
+# messages maps msg_name -> SnapshotMessage in bridge order
+DictionarySnapshot = namedtuple('DictionarySnapshot', ['plugin_pkg', 'msg_pkg', 'created',
+                                                       'messages'])
+
+_MSG_TYPES = {"COMMAND": MessageInfo.COMMAND, "TELEMETRY": MessageInfo.TELEMETRY,
+              "HELPER": MessageInfo.HELPER}
+
+
+def snapshot_dictionary(dictionary_info):
+    fingerprints = structural_fingerprints(dictionary_info)
+    messages = {}
+    for name, kind, struct, info in dictionary_info.iter_messages():
+        messages[name] = SnapshotMessage(kind, struct, info, fingerprints[name])
+    return DictionarySnapshot(dictionary_info.plugin_pkg, dictionary_info.msg_pkg,
+                              time.time(), messages)
+
+
+def snapshot_message_infos(snapshot):
+    # the snapshot as a list DictionaryInfo.init accepts
+    return [CachedMessageInfo(name, _MSG_TYPES[m.kind], m.json, m.info)
+            for name, m in snapshot.messages.items()]
+
+
+def save_snapshot(path, snapshot):
+    doc = {
+        'version': SNAPSHOT_FORMAT_VERSION,
+        'plugin_pkg': snapshot.plugin_pkg,
+        'msg_pkg': snapshot.msg_pkg,
+        'created': snapshot.created,
+        'messages': [[name, m.kind, m.json, m.info, m.fingerprint]
+                     for name, m in snapshot.messages.items()],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        json.dump(doc, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    # raises OSError or ValueError for a missing, unreadable or incompatible file
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        doc = json.load(f)
+    if doc.get('version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError("unsupported snapshot version in " + path)
+    messages = {m[0]: SnapshotMessage(m[1], m[2], m[3], m[4]) for m in doc['messages']}
+    return DictionarySnapshot(doc['plugin_pkg'], doc['msg_pkg'], doc['created'], messages)
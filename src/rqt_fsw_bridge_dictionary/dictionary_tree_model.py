@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+from python_qt_binding.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+
+class _Node:
+    # a bridge (children are categories) or a category (names are its message rows)
+    __slots__ = ('name', 'row', 'parent', 'bridge', 'children', 'names', 'fetched')
+
+    def __init__(self, name, row, parent, bridge, names=None):
+        self.name = name
+        self.row = row
+        self.parent = parent
+        self.bridge = bridge
+        self.children = []
+        self.names = names
+        self.fetched = 0
+
+
+class DictionaryTreeModel(QAbstractItemModel):
+    """Category -> message model backed by the DictionaryInfo name lists.
+
+    No per-message objects are created: message rows are handed to the view in
+    batches of ``fetch_batch_size`` through canFetchMore/fetchMore as they scroll
+    into view. With more than one bridge, each bridge becomes a top-level row with
+    its own categories underneath, and a bridge's rows can be replaced without
+    touching the others.
+    """
+
+    def __init__(self, parent=None, fetch_batch_size=256):
+        super(DictionaryTreeModel, self).__init__(parent)
+        self._fetch_batch_size = fetch_batch_size
+        self._dictionaries = {}
+        self._name_filters = {}
+        self._roots = []
+        self._fetching = False
+
+    def set_dictionary(self, msg_dict, bridge=""):
+        new_bridge = bridge not in self._dictionaries
+        self._dictionaries[bridge] = msg_dict
+        if new_bridge or len(self._dictionaries) == 1:
+            self._reset()
+        else:
+            self._replace_bridge(bridge)
+
+    def update_dictionary(self, msg_dict, bridge=""):
+        # like set_dictionary, but only the rows of messages that were added or removed
+        # are touched, so expansion, selection and scroll position survive a reload
+        old_dict = self._dictionaries.get(bridge)
+        if old_dict is None or list(old_dict) != list(msg_dict):
+            self.set_dictionary(msg_dict, bridge)
+            return
+        self._dictionaries[bridge] = msg_dict
+        name_filter = self._name_filters.get(bridge)
+        for category in self._categories(bridge):
+            names = msg_dict[category.name]
+            if name_filter is not None:
+                names = [n for n in names if n in name_filter]
+            if names != category.names:
+                self._update_category(category, names)
+
+    def remove_dictionary(self, bridge=""):
+        if self._dictionaries.pop(bridge, None) is not None:
+            self._name_filters.pop(bridge, None)
+            self._reset()
+
+    def set_name_filter(self, names, bridge=""):
+        # names is a set of message names to show, or None to show everything
+        self._name_filters[bridge] = names
+        if len(self._dictionaries) == 1:
+            self._reset()
+        elif bridge in self._dictionaries:
+            self._replace_bridge(bridge)
+
+    def has_dictionary(self, bridge=""):
+        return bridge in self._dictionaries
+
+    def category_indexes(self):
+        # every bridge and category row, i.e. the rows the view expands by default
+        indexes = []
+        for root in self._roots:
+            root_index = self.createIndex(root.row, 0)
+            indexes.append(root_index)
+            indexes.extend(self.index(c.row, 0, root_index) for c in root.children)
+        return indexes
+
+    def message_name(self, index):
+        return self.message_ref(index)[1]
+
+    def message_ref(self, index):
+        # (bridge, msg_name) of a message row, or ("", "") for any other row
+        if not index.isValid():
+            return "", ""
+        parent = index.internalPointer()
+        if parent is None or parent.names is None:
+            return "", ""
+        return parent.bridge, parent.names[index.row()]
+
+    def _node_index(self, node):
+        # top-level rows carry no pointer, exactly as index() creates them
+        if node.parent is None:
+            return self.createIndex(node.row, 0)
+        return self.createIndex(node.row, 0, node.parent)
+
+    def _make_categories(self, bridge, parent):
+        msg_dict = self._dictionaries[bridge]
+        name_filter = self._name_filters.get(bridge)
+        categories = []
+        for row, (name, names) in enumerate(msg_dict.items()):
+            if name_filter is not None:
+                names = [n for n in names if n in name_filter]
+            categories.append(_Node(name, row, parent, bridge, names))
+        return categories
+
+    def _categories(self, bridge):
+        if len(self._dictionaries) == 1:
+            return self._roots
+        return next(r for r in self._roots if r.bridge == bridge).children
+
+    def _update_category(self, category, new_names):
+        parent = self._node_index(category)
+        old_names = category.names
+        if len(new_names) > len(old_names) and new_names[:len(old_names)] == old_names:
+            # only appended, e.g. by a dictionary that is still loading
+            category.names = list(old_names)
+            self._insert_rows(category, parent, len(old_names), new_names[len(old_names):])
+            return
+        old_set = set(old_names)
+        new_set = set(new_names)
+        kept = [n for n in old_names if n in new_set]
+        if kept != [n for n in new_names if n in old_set]:
+            # messages were reordered: replace the rows of this category
+            if category.fetched:
+                self.beginRemoveRows(parent, 0, category.fetched - 1)
+                category.fetched = 0
+                category.names = []
+                self.endRemoveRows()
+            category.names = list(new_names)
+            return
+
+        # the name list may be shared with the DictionaryInfo it came from
+        category.names = list(old_names)
+        # removed runs bottom up, so row numbers above them stay valid
+        i = len(old_names)
+        while i > 0:
+            i -= 1
+            if old_names[i] in new_set:
+                continue
+            first = i
+            while first > 0 and old_names[first - 1] not in new_set:
+                first -= 1
+            self._remove_rows(category, parent, first, i)
+            i = first
+        # added runs top down, after which names[:i] == new_names[:i]
+        i = 0
+        while i < len(new_names):
+            if new_names[i] in old_set:
+                i += 1
+                continue
+            last = i
+            while last + 1 < len(new_names) and new_names[last + 1] not in old_set:
+                last += 1
+            self._insert_rows(category, parent, i, new_names[i:last + 1])
+            i = last + 1
+
+    def _remove_rows(self, category, parent, first, last):
+        # rows past category.fetched are not known to the view yet
+        if first < category.fetched:
+            visible_last = min(last, category.fetched - 1)
+            self.beginRemoveRows(parent, first, visible_last)
+            del category.names[first:last + 1]
+            category.fetched -= visible_last - first + 1
+            self.endRemoveRows()
+        else:
+            del category.names[first:last + 1]
+
+    def _insert_rows(self, category, parent, row, names):
+        # appending to a fully fetched category shows up to one batch right away, the
+        # rest is fetched as it scrolls into view
+        if row < category.fetched:
+            shown = len(names)
+        elif category.fetched == len(category.names):
+            shown = min(len(names), self._fetch_batch_size)
+        else:
+            shown = 0
+        if shown:
+            self.beginInsertRows(parent, row, row + shown - 1)
+            category.names[row:row] = names
+            category.fetched += shown
+            self.endInsertRows()
+        else:
+            category.names[row:row] = names
+
+    def _reset(self):
+        self.beginResetModel()
+        if len(self._dictionaries) == 1:
+            bridge = next(iter(self._dictionaries))
+            self._roots = self._make_categories(bridge, None)
+        else:
+            self._roots = []
+            for row, bridge in enumerate(self._dictionaries):
+                root = _Node(bridge, row, None, bridge)
+                root.children = self._make_categories(bridge, root)
+                self._roots.append(root)
+        self.endResetModel()
+
+    def _replace_bridge(self, bridge):
+        root = next(r for r in self._roots if r.bridge == bridge)
+        root_index = self._node_index(root)
+        if root.children:
+            self.beginRemoveRows(root_index, 0, len(root.children) - 1)
+            root.children = []
+            self.endRemoveRows()
+        categories = self._make_categories(bridge, root)
+        if categories:
+            self.beginInsertRows(root_index, 0, len(categories) - 1)
+            root.children = categories
+            self.endInsertRows()
+
+    def _node(self, index):
+        # the bridge/category node an index refers to, None for message rows
+        parent = index.internalPointer()
+        if parent is None:
+            return self._roots[index.row()]
+        if parent.names is not None:
+            return None
+        return parent.children[index.row()]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column)
+        return self.createIndex(row, column, self._node(parent))
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer()
+        if parent is None:
+            return QModelIndex()
+        return self._node_index(parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._roots)
+        node = self._node(parent)
+        if node is None:
+            return 0
+        if node.names is not None:
+            return node.fetched
+        return len(node.children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._roots)
+        node = self._node(parent)
+        if node is None:
+            return False
+        if node.names is not None:
+            return bool(node.names)
+        return bool(node.children)
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        node = self._node(parent)
+        return node is not None and node.names is not None and node.fetched < len(node.names)
+
+    def fetchMore(self, parent):
+        # a rowsAboutToBeInserted handler may ask for more before this batch is counted
+        if self._fetching or not self.canFetchMore(parent):
+            return
+        category = self._node(parent)
+        n = min(self._fetch_batch_size, len(category.names) - category.fetched)
+        self._fetching = True
+        try:
+            self.beginInsertRows(parent, category.fetched, category.fetched + n - 1)
+            category.fetched += n
+            self.endInsertRows()
+        finally:
+            self._fetching = False
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        node = self._node(index)
+        if node is None:
+            return index.internalPointer().names[index.row()]
+        return node.name
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section == 0:
+            return "messages"
+        return None
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import threading
+
+
+class InfoEditQueue:
+    """Local set of edited message info waiting to be written back to the bridge.
+
+    Edits are keyed by message name, so saving the same message repeatedly only
+    ever sends its latest info. ``flush`` writes the queue in the background with at
+    most ``batch_size`` SetMessageInfo requests in flight, retrying failed ones up to
+    ``max_retries`` times. ``on_progress(done, total)``, ``on_finished(failed)`` and
+    ``on_committed(msg_name, info)``, for every edit the bridge accepted, are called
+    from the executor thread.
+    """
+
+    def __init__(self, bridge_client, batch_size=16, max_retries=3, retry_delay_sec=0.5,
+                 on_progress=None, on_finished=None, on_committed=None):
+        self._bridge_client = bridge_client
+        self._batch_size = batch_size
+        self._max_retries = max_retries
+        self._retry_delay_sec = retry_delay_sec
+        self._on_progress = on_progress
+        self._on_finished = on_finished
+        self._on_committed = on_committed
+
+        self._lock = threading.Lock()
+        self._dirty = {}
+        self._flushing = False
+        self._pkg_name = ""
+        self._to_send = []
+        self._in_flight = 0
+        self._attempts = {}
+        self._failed = []
+        self._done = 0
+        self._total = 0
+
+    def record(self, msg_name, info):
+        with self._lock:
+            self._dirty[msg_name] = info
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._dirty)
+
+    def is_flushing(self):
+        with self._lock:
+            return self._flushing
+
+    def flush(self, pkg_name):
+        with self._lock:
+            if self._flushing or not self._dirty:
+                return False
+            self._flushing = True
+            self._pkg_name = pkg_name
+            self._to_send = list(self._dirty.keys())
+            self._attempts = {}
+            self._failed = []
+            self._done = 0
+            self._total = len(self._to_send)
+        self._send_next()
+        return True
+
+    def _send_next(self):
+        batch = []
+        with self._lock:
+            while self._to_send and self._in_flight < self._batch_size:
+                msg_name = self._to_send.pop()
+                if msg_name not in self._dirty:
+                    self._done += 1
+                    continue
+                self._in_flight += 1
+                batch.append((msg_name, self._dirty[msg_name]))
+            finished = not self._to_send and self._in_flight == 0 and self._flushing
+            if finished:
+                self._flushing = False
+            failed = list(self._failed)
+
+        for msg_name, info in batch:
+            self._bridge_client.request_set_message_info(
+                self._pkg_name, msg_name, info,
+                lambda r, n=msg_name, i=info: self._on_response(n, i, r))
+        if finished and self._on_finished is not None:
+            self._on_finished(failed)
+
+    def _on_response(self, msg_name, info, r):
+        retry = False
+        with self._lock:
+            self._in_flight -= 1
+            if r:
+                # a newer edit made while this one was in flight stays queued
+                if self._dirty.get(msg_name) == info:
+                    del self._dirty[msg_name]
+                self._done += 1
+            else:
+                attempts = self._attempts.get(msg_name, 0) + 1
+                self._attempts[msg_name] = attempts
+                if attempts <= self._max_retries:
+                    # still counted as in flight until the retry is queued again
+                    self._in_flight += 1
+                    retry = True
+                    delay = self._retry_delay_sec * (2 ** (attempts - 1))
+                else:
+                    self._failed.append(msg_name)
+                    self._done += 1
+            done, total = self._done, self._total
+
+        if retry:
+            timer = threading.Timer(delay, self._retry, args=(msg_name,))
+            timer.daemon = True
+            timer.start()
+            return
+        if r and self._on_committed is not None:
+            self._on_committed(msg_name, info)
+        if self._on_progress is not None:
+            self._on_progress(done, total)
+        self._send_next()
+
+    def _retry(self, msg_name):
+        with self._lock:
+            self._in_flight -= 1
+            self._to_send.append(msg_name)
+        self._send_next()
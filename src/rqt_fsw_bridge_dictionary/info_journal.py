@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+from .dictionary_cache import default_cache_dir
+
+
+JOURNAL_FORMAT_VERSION = 1
+
+# one saved info text of a message; versions are numbered across the whole journal
+InfoVersion = namedtuple('InfoVersion', ['version', 'time', 'info', 'committed'])
+
+
+def journal_path(namespace, plugin_name, msg_pkg, cache_dir=None):
+    # '<dir>/<key>.journal'; compaction writes '<dir>/<key>.journal.snapshot' next to it
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    key = re.sub(r'[^A-Za-z0-9_.-]', '_',
+                 namespace.strip('/') + '__' + plugin_name + '__' + msg_pkg)
+    return os.path.join(cache_dir, key + '.journal')
+
+
+class InfoJournal:
+    """Append-only, crash-safe log of the info edits made to one bridge's dictionary.
+
+    Every save appends one json line, ``["e", version, time, msg_name, info]``, and
+    every edit the bridge accepted appends ``["c", version, msg_name]``. Lines are
+    flushed right away but fsynced in batches, after ``sync_batch`` records or
+    ``sync_interval_sec`` seconds, whichever comes first. Once ``compact_after``
+    records have been appended, the state is rewritten into a snapshot keeping the
+    last ``keep_versions`` versions of each message, and the log starts over.
+    Opening the journal replays the snapshot and then the log; a torn last line
+    from a crash is dropped.
+    """
+
+    def __init__(self, path, sync_batch=64, sync_interval_sec=0.5, compact_after=1000,
+                 keep_versions=20):
+        self.path = path
+        self._snapshot_path = path + '.snapshot'
+        self._sync_batch = sync_batch
+        self._sync_interval_sec = sync_interval_sec
+        self._compact_after = compact_after
+        self._keep_versions = keep_versions
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._history = {}
+        self._next_version = 1
+        self._records = 0
+        self._unsynced = 0
+        self._sync_timer = None
+
+    def open(self):
+        # raises OSError when the journal directory is not writable
+        with self._lock:
+            self._open()
+        return self
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def reload(self):
+        # pick up what other processes wrote since this one opened the journal; the lock
+        # is held throughout, so no record made meanwhile finds the journal closed
+        with self._lock:
+            self._close()
+            self._open()
+        return self
+
+    def record(self, msg_name, info):
+        with self._lock:
+            version = self._next_version
+            self._next_version += 1
+            entry = InfoVersion(version, time.time(), info, False)
+            self._add(msg_name, entry)
+            self._append(['e', version, entry.time, msg_name, info])
+            return version
+
+    def mark_committed(self, msg_name, info):
+        # the bridge accepted ``info``; called from the executor thread
+        with self._lock:
+            history = self._history.get(msg_name)
+            if not history:
+                return
+            for i in range(len(history) - 1, -1, -1):
+                entry = history[i]
+                if entry.info == info:
+                    if not entry.committed:
+                        history[i] = entry._replace(committed=True)
+                        self._append(['c', entry.version, msg_name])
+                    return
+
+    def history(self, msg_name):
+        # oldest first
+        with self._lock:
+            return list(self._history.get(msg_name, ()))
+
+    def version(self, msg_name, version):
+        with self._lock:
+            for entry in self._history.get(msg_name, ()):
+                if entry.version == version:
+                    return entry
+            return None
+
+    def pending(self):
+        # {msg_name: info} of every message whose latest edit has not reached the bridge
+        with self._lock:
+            return {name: history[-1].info for name, history in self._history.items()
+                    if not history[-1].committed}
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _open(self):
+        self._replay()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._records >= self._compact_after:
+            self._compact()
+
+    def _close(self):
+        if self._file is None:
+            return
+        self._sync()
+        self._file.close()
+        self._file = None
+
+    def _add(self, msg_name, entry):
+        history = self._history.setdefault(msg_name, [])
+        history.append(entry)
+        if len(history) > self._keep_versions:
+            del history[0]
+
+    def _append(self, record):
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        self._records += 1
+        self._unsynced += 1
+        if self._records >= self._compact_after:
+            self._compact()
+        elif self._unsynced >= self._sync_batch:
+            self._sync()
+        elif self._sync_timer is None:
+            self._sync_timer = threading.Timer(self._sync_interval_sec, self.sync)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def _sync(self):
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+            self._sync_timer = None
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def _compact(self):
+        # the snapshot is complete and durable before the log is cut, and replay skips
+        # log records the snapshot already holds, so a crash at any point loses nothing
+        doc = {
+            'version': JOURNAL_FORMAT_VERSION,
+            'next_version': self._next_version,
+            'messages': {name: [list(entry) for entry in history]
+                         for name, history in self._history.items()},
+        }
+        tmp_path = self._snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        if self._file is not None:
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+        self._records = 0
+        self._unsynced = 0
+
+    def _replay(self):
+        self._history = {}
+        self._next_version = 1
+        self._records = 0
+        try:
+            with open(self._snapshot_path, encoding='utf-8') as f:
+                doc = json.load(f)
+            if doc.get('version') == JOURNAL_FORMAT_VERSION:
+                self._next_version = doc['next_version']
+                for name, history in doc['messages'].items():
+                    self._history[name] = [InfoVersion(*entry) for entry in history]
+        except (OSError, ValueError):
+            pass
+        snapshot_next = self._next_version
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = b''
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            # cut a torn last record, or the next append would be glued onto it
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+        for line in data[:end].decode('utf-8', errors='replace').splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self._records += 1
+            if record[0] == 'e':
+                _, version, t, msg_name, info = record
+                if version < snapshot_next:
+                    continue
+                self._add(msg_name, InfoVersion(version, t, info, False))
+                self._next_version = max(self._next_version, version + 1)
+            elif record[0] == 'c':
+                _, version, msg_name = record
+                history = self._history.get(msg_name, [])
+                for i, entry in enumerate(history):
+                    if entry.version == version:
+                        history[i] = entry._replace(committed=True)
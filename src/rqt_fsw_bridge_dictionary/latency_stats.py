@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+
+_N_BUCKETS = 40
+
+
+class LatencyHistogram:
+    """Count/total/max plus a log2 histogram of latencies in microseconds.
+
+    Bucket ``i`` holds samples below ``2**i`` us, so recording is a bit_length() and an
+    increment, and percentiles are reported as the upper bound of their bucket.
+    """
+
+    __slots__ = ('count', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * _N_BUCKETS
+
+    def record(self, ns):
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.buckets[min((ns // 1000).bit_length(), _N_BUCKETS - 1)] += 1
+
+    def percentile_ms(self, p):
+        if not self.count:
+            return 0.0
+        threshold = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= threshold:
+                return min((1 << i) / 1000.0, self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+    def mean_ms(self):
+        return self.total_ns / self.count / 1e6 if self.count else 0.0
+
+
+class _Timer:
+    __slots__ = ('_stats', '_name', '_start')
+
+    def __init__(self, stats, name):
+        self._stats = stats
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stats.record(self._name, time.perf_counter_ns() - self._start)
+        return False
+
+
+class LatencyStats:
+    """Thread-safe set of named latency histograms.
+
+    ``with stats.timer('name'):`` times a block; ``record(name, ns)`` adds a sample
+    measured elsewhere, e.g. the round trip of an asynchronous service call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def record(self, name, ns):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                self._histograms[name] = histogram = LatencyHistogram()
+            histogram.record(ns)
+
+    def snapshot(self):
+        # [(name, count, mean_ms, p50_ms, p95_ms, max_ms)] sorted by name
+        with self._lock:
+            return [(name, h.count, h.mean_ms(), h.percentile_ms(50), h.percentile_ms(95),
+                     h.max_ns / 1e6)
+                    for name, h in sorted(self._histograms.items())]
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import sys
+from array import array
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+
+KINDS = ("COMMAND", "TELEMETRY", "HELPER")
+
+
+def message_kind(msg_type):
+    if msg_type == MessageInfo.TELEMETRY:
+        return "TELEMETRY"
+    if msg_type == MessageInfo.COMMAND:
+        return "COMMAND"
+    return "HELPER"
+
+
+class MessageStore:
+    """Column store of one bridge dictionary.
+
+    The struct json and info text of every message are packed into two utf-8 blobs
+    with an offset array each, and kinds into a bytearray, so a message costs its
+    interned name, one dict slot and a few bytes of offsets on top of its payload.
+    Nothing refers back to the response messages it was built from. Edited info
+    is kept in a small overlay instead of rewriting the blob.
+    """
+
+    def __init__(self, message_info_list=()):
+        self._rows = {}
+        self._names = []
+        self._kinds = bytearray()
+        structs = bytearray()
+        infos = bytearray()
+        self._struct_offsets = array('Q', [0])
+        self._info_offsets = array('Q', [0])
+        self._info_edits = {}
+
+        kind_codes = {kind: i for i, kind in enumerate(KINDS)}
+        for m in message_info_list:
+            name = sys.intern(m.msg_name)
+            if name not in self._rows:
+                self._names.append(name)
+            # a repeated name replaces the earlier entry but keeps its position
+            self._rows[name] = len(self._kinds)
+            self._kinds.append(kind_codes[message_kind(m.msg_type)])
+            structs += (m.json or "").encode('utf-8')
+            infos += (m.info or "").encode('utf-8')
+            self._struct_offsets.append(len(structs))
+            self._info_offsets.append(len(infos))
+        self._structs = bytes(structs)
+        self._infos = bytes(infos)
+
+    def extend(self, other):
+        # appends the messages of another store, e.g. one chunk of a response packed on a
+        # worker thread; only the offsets are rewritten, the blobs are copied as they are.
+        # The blobs grow in place until freeze(), so a load in chunks stays linear
+        rows = len(self._kinds)
+        struct_end = self._struct_offsets[-1]
+        info_end = self._info_offsets[-1]
+        if not isinstance(self._structs, bytearray):
+            self._structs = bytearray(self._structs)
+            self._infos = bytearray(self._infos)
+        self._structs += other._structs
+        self._infos += other._infos
+        self._struct_offsets.extend(o + struct_end for o in other._struct_offsets[1:])
+        self._info_offsets.extend(o + info_end for o in other._info_offsets[1:])
+        self._kinds += other._kinds
+        for name in other._names:
+            if name not in self._rows:
+                self._names.append(name)
+        for name, row in other._rows.items():
+            self._rows[name] = rows + row
+        self._info_edits.update(other._info_edits)
+
+    def freeze(self):
+        # back to immutable blobs once the last chunk is in
+        self._structs = bytes(self._structs)
+        self._infos = bytes(self._infos)
+        return self
+
+    def copy(self):
+        # a store later loads and edits of this one do not touch; frozen blobs are shared
+        store = MessageStore()
+        store._rows = dict(self._rows)
+        store._names = list(self._names)
+        store._kinds = bytearray(self._kinds)
+        store._structs = bytes(self._structs)
+        store._infos = bytes(self._infos)
+        store._struct_offsets = array('Q', self._struct_offsets)
+        store._info_offsets = array('Q', self._info_offsets)
+        store._info_edits = dict(self._info_edits)
+        return store
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, msg_name):
+        return msg_name in self._rows
+
+    def names(self):
+        # names in bridge order
+        return self._names
+
+    def kind(self, msg_name):
+        return KINDS[self._kinds[self._rows[msg_name]]]
+
+    def struct_bytes(self, msg_name):
+        row = self._rows[msg_name]
+        # bytes even while the blob still grows
+        return bytes(self._structs[self._struct_offsets[row]:self._struct_offsets[row + 1]])
+
+    def info(self, msg_name):
+        info = self._info_edits.get(msg_name)
+        if info is not None:
+            return info
+        row = self._rows[msg_name]
+        return self._infos[self._info_offsets[row]:self._info_offsets[row + 1]].decode('utf-8')
+
+    def set_info(self, msg_name, info):
+        if msg_name in self._rows:
+            self._info_edits[msg_name] = info
+
+    def edited_infos(self):
+        return dict(self._info_edits)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+
+from .type_expr import PRIMITIVE_SIZES, ArrayType, MessageType, PrimitiveType, SequenceType
+from .type_expr import StringType, parse_type
+
+# size is the exact size in bytes, None when it varies; max_size is the upper bound,
+# None when there is none. Offsets are relative to the enclosing type and None after
+# the first member of variable size.
+FieldLayout = namedtuple('FieldLayout', ['name', 'type', 'offset', 'size', 'max_size'])
+TypeLayout = namedtuple('TypeLayout', ['size', 'max_size', 'fields'])
+
+_UNSIZED = (None, None)
+
+
+def _add(a, b):
+    return a + b if a is not None and b is not None else None
+
+
+def _multiply(size, n):
+    return size * n if size is not None else None
+
+
+class PacketLayout:
+    """Packed (no padding) wire layout of the types of one DictionaryInfo.
+
+    The size of every type is worked out once and memoized, so sizing the whole
+    dictionary visits each type a single time; per-field layouts are only built
+    for the types that are shown. Strings and unbounded sequences have no fixed
+    size; bounded ones still give an upper bound. A recursive type can only be
+    sized through a sequence, so its recursion counts as unbounded.
+    """
+
+    def __init__(self, dictionary_info):
+        self._dictionary_info = dictionary_info
+        self._sizes = {}
+        self._field_sizes = {}
+        self._layouts = {}
+        self._in_progress = set()
+
+    def type_size(self, type_name):
+        # (size, max_size) of a type, None for types the dictionary does not define
+        sizes = self._sizes.get(type_name)
+        if sizes is not None:
+            return sizes
+        if type_name in self._in_progress or not self._dictionary_info.has_message(type_name):
+            return None
+        self._in_progress.add(type_name)
+        try:
+            size = 0
+            max_size = 0
+            for _, type_text in self._dictionary_info.get_message_items(type_name):
+                field_size, field_max = self.field_size(type_text)
+                size = _add(size, field_size)
+                max_size = _add(max_size, field_max)
+        finally:
+            self._in_progress.discard(type_name)
+        sizes = (size, max_size)
+        self._sizes[type_name] = sizes
+        return sizes
+
+    def type_layout(self, type_name):
+        # TypeLayout with per-field offsets, None for types the dictionary does not define
+        layout = self._layouts.get(type_name)
+        if layout is not None:
+            return layout
+        sizes = self.type_size(type_name)
+        if sizes is None:
+            return None
+        fields = []
+        offset = 0
+        for name, type_text in self._dictionary_info.get_message_fields(type_name):
+            field_size, field_max = self.field_size(type_text)
+            fields.append(FieldLayout(name, type_text, offset, field_size, field_max))
+            offset = _add(offset, field_size)
+        layout = TypeLayout(sizes[0], sizes[1], tuple(fields))
+        self._layouts[type_name] = layout
+        return layout
+
+    def message_sizes(self, msg_names=None):
+        # [(msg_name, size, max_size)] for the whole dictionary, or the given names
+        if msg_names is None:
+            msg_names = [name for name, _, _, _ in self._dictionary_info.iter_messages()]
+        return [(name,) + self.type_size(name) for name in msg_names]
+
+    def field_size(self, type_text):
+        # (size, max_size) of one member, e.g. 'uint8[4]' -> (4, 4); the same few type
+        # texts make up most fields, so they are memoized as well. A type met again
+        # while it is being laid out is on a cycle, so caching it as unsized is right.
+        sizes = self._field_sizes.get(type_text)
+        if sizes is None:
+            sizes = self._type_expr_size(parse_type(type_text))
+            self._field_sizes[type_text] = sizes
+        return sizes
+
+    def _type_expr_size(self, t):
+        if isinstance(t, PrimitiveType):
+            fixed = PRIMITIVE_SIZES[t.name]
+            return fixed, fixed
+        if isinstance(t, StringType):
+            return None, t.bound
+        if isinstance(t, ArrayType):
+            element_size, element_max = self._type_expr_size(t.element)
+            return _multiply(element_size, t.length), _multiply(element_max, t.length)
+        if isinstance(t, SequenceType):
+            if t.bound is None:
+                return _UNSIZED
+            _, element_max = self._type_expr_size(t.element)
+            return None, _multiply(element_max, t.bound)
+        if isinstance(t, MessageType):
+            name = self._dictionary_info.resolve_type(t)
+            sizes = self.type_size(name) if name is not None else None
+            if sizes is not None:
+                return sizes
+        return _UNSIZED
+
+
+def format_size(size, max_size):
+    # '12', '<= 40' or 'var'
+    if size is not None:
+        return str(size)
+    if max_size is not None:
+        return "<= " + str(max_size)
+    return "var"
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+from python_qt_binding.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from .packet_layout import format_size
+
+
+class PacketSizeTableModel(QAbstractTableModel):
+    """One row per message with its wire size, sortable on every column.
+
+    Rows are plain tuples (bridge, name, kind, size, max_size); sizes are None when
+    there is no exact size or no bound, and sort as larger than any known size.
+    """
+
+    _headers = ["bridge", "message", "type", "size", "max size"]
+
+    def __init__(self, parent=None):
+        super(PacketSizeTableModel, self).__init__(parent)
+        self._rows = []
+        self._sort = None
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = list(rows)
+        if self._sort is not None:
+            self._sort_rows(*self._sort)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 3:
+                return format_size(row[3], row[4])
+            if column == 4:
+                return format_size(row[4], row[4])
+            return row[column]
+        if role == Qt.TextAlignmentRole and column >= 3:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.beginResetModel()
+        self._sort = (column, order)
+        self._sort_rows(column, order)
+        self.endResetModel()
+
+    def _sort_rows(self, column, order):
+        if column >= 3:
+            # bounded rows sort by their bound in the size column too
+            def key(row):
+                value = row[column] if row[column] is not None else row[4]
+                return (value is None, value or 0)
+        else:
+            def key(row):
+                return row[column]
+        self._rows.sort(key=key, reverse=(order == Qt.DescendingOrder))
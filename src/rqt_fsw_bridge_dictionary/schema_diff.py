@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import hashlib
+from collections import namedtuple
+
+from .dictionary_info import parse_struct_items, parse_struct_json
+from .type_expr import parse_type, resolve_message
+
+
+# a message present in both dictionaries whose structural fingerprint differs
+MessageChange = namedtuple('MessageChange', ['name', 'old_kind', 'new_kind', 'added_fields',
+                                             'removed_fields', 'changed_fields',
+                                             'changed_types'])
+
+SchemaDiff = namedtuple('SchemaDiff', ['added', 'removed', 'changed'])
+
+
+def local_fingerprint(kind, fields):
+    # hash of the message's own kind and fields, nested types only by name
+    h = hashlib.sha1(kind.encode('utf-8'))
+    for name, type_name in fields:
+        h.update(b'\0' + name.encode('utf-8') + b'\0' + type_name.encode('utf-8'))
+    return h.digest()
+
+
+def structural_fingerprints(dictionary_info):
+    """Map every message name to a hex hash of its structure and of everything it nests.
+
+    Types are hashed in dependency order, each from its own fields plus the
+    fingerprints of the types it embeds, so the whole pass is linear in the number
+    of fields. A set of mutually recursive types is hashed as one group.
+    """
+    local = {}
+    for name, kind, struct, _ in dictionary_info.iter_messages():
+        local[name] = local_fingerprint(kind, parse_struct_items(struct))
+    type_usage = dictionary_info.type_usage
+    digests = {}
+    for component in type_usage.components():
+        members = set(component)
+        group = hashlib.sha1()
+        if len(component) > 1 or component[0] in type_usage.dependencies(component[0]):
+            for name in sorted(component):
+                group.update(name.encode('utf-8') + b'\0' + local.get(name, b''))
+        for name in component:
+            # types the dictionary does not define only contribute their name
+            h = hashlib.sha1(local.get(name, b'\0'))
+            h.update(group.digest())
+            for dep in type_usage.dependencies(name):
+                h.update(dep.encode('utf-8'))
+                if dep not in members:
+                    h.update(digests[dep])
+            digests[name] = h.digest()
+    return {name: digests[name].hex() for name in local}
+
+
+def _field_changes(old_fields, new_fields):
+    old_types = dict(old_fields)
+    new_types = dict(new_fields)
+    added = [(n, t) for n, t in new_fields if n not in old_types]
+    removed = [(n, t) for n, t in old_fields if n not in new_types]
+    changed = [(n, old_types[n], t) for n, t in new_fields
+               if n in old_types and old_types[n] != t]
+    return added, removed, changed
+
+
+def diff_snapshots(old, new):
+    """Compare two DictionarySnapshots.
+
+    Messages with equal fingerprints are skipped without looking at their
+    structs; only the ones that differ are parsed and compared field by field.
+    """
+    added = [n for n in new.messages if n not in old.messages]
+    removed = [n for n in old.messages if n not in new.messages]
+    differing = [n for n, m in new.messages.items()
+                 if n in old.messages and old.messages[n].fingerprint != m.fingerprint]
+    touched = set(differing)
+    touched.update(added)
+    touched.update(removed)
+
+    changed = []
+    for name in differing:
+        old_msg = old.messages[name]
+        new_msg = new.messages[name]
+        old_fields = parse_struct_json(old_msg.json)
+        new_fields = parse_struct_json(new_msg.json)
+        added_fields, removed_fields, changed_fields = _field_changes(old_fields, new_fields)
+        # nested types that changed themselves; each one is reported in its own entry
+        nested = set(resolve_message(parse_type(t), new.msg_pkg, touched) for _, t in new_fields)
+        nested.discard(name)
+        nested.discard(None)
+        changed.append(MessageChange(name, old_msg.kind, new_msg.kind, added_fields,
+                                     removed_fields, changed_fields, sorted(nested)))
+    return SchemaDiff(added, removed, changed)
+
+
+def diff_to_dict(diff):
+    return {
+        'added': diff.added,
+        'removed': diff.removed,
+        'changed': [{
+            'name': c.name,
+            'old_kind': c.old_kind,
+            'new_kind': c.new_kind,
+            'added_fields': [{'name': n, 'type': t} for n, t in c.added_fields],
+            'removed_fields': [{'name': n, 'type': t} for n, t in c.removed_fields],
+            'changed_fields': [{'name': n, 'old_type': o, 'new_type': t}
+                               for n, o, t in c.changed_fields],
+            'changed_types': c.changed_types,
+        } for c in diff.changed],
+    }
+
+
+def format_diff(diff):
+    # diff(1)-like text, one line per message and per field
+    for name in diff.added:
+        yield "+ " + name
+    for name in diff.removed:
+        yield "- " + name
+    for c in diff.changed:
+        yield "~ " + c.name
+        if c.old_kind != c.new_kind:
+            yield "    type " + c.old_kind + " -> " + c.new_kind
+        for n, t in c.added_fields:
+            yield "    + " + n + ": " + t
+        for n, t in c.removed_fields:
+            yield "    - " + n + ": " + t
+        for n, o, t in c.changed_fields:
+            yield "    ~ " + n + ": " + o + " -> " + t
+        for t in c.changed_types:
+            yield "    ~ nested " + t
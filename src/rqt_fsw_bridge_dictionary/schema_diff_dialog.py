@@ -0,0 +1,34 @@
+from python_qt_binding.QtWidgets import QDialog, QDialogButtonBox
+from python_qt_binding.QtWidgets import QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem
+
+from .schema_diff import format_diff
+
+
+class SchemaDiffDialog(QDialog):
+    def __init__(self, title, diff, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle("ROS2-FSW Bridge Dictionary Diff")
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close)
+        self.buttonBox.rejected.connect(self.reject)
+
+        # one row per message, its field changes underneath
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        message_item = None
+        for line in format_diff(diff):
+            if line.startswith(" "):
+                message_item.addChild(QTreeWidgetItem([line.strip()]))
+            else:
+                message_item = QTreeWidgetItem([line])
+                self.tree.addTopLevelItem(message_item)
+
+        summary = (str(len(diff.added)) + " added, " + str(len(diff.removed)) + " removed, "
+                   + str(len(diff.changed)) + " changed")
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(QLabel(title))
+        self.layout.addWidget(QLabel(summary))
+        self.layout.addWidget(self.tree)
+        self.layout.addWidget(self.buttonBox)
+        self.setLayout(self.layout)
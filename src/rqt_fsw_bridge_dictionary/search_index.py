@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import re
+from bisect import bisect_left, insort
+
+
+_WORD_RE = re.compile(r'[a-z0-9_]+')
+
+# results of prefixes with at least this many postings are cached: the union is what costs
+_CACHE_MIN_POSTINGS = 4096
+# names kept in cached results, summed over the cache, per indexed message; the least
+# recently used results are dropped beyond that
+_CACHE_NAMES_PER_MESSAGE = 16
+
+
+def tokenize(text):
+    # whole lower-cased words plus their '_'-separated parts, so 'cfe_msgs/Header'
+    # can be found with 'cfe_msgs', 'msgs' or 'header'
+    tokens = set()
+    for word in _WORD_RE.findall(text.lower()):
+        tokens.add(word)
+        if '_' in word:
+            tokens.update(p for p in word.split('_') if p)
+    return tokens
+
+
+class SearchIndex:
+    """Inverted index from lower-case tokens to the names of the messages using them.
+
+    Names, field names and field types are indexed once; info text is indexed per
+    message so it can be replaced when the info is edited. Queries are split into
+    words like the indexed text, so 'cfe_msgs/Hdr' is 'cfe_msgs' and 'hdr'; every
+    word must be a whole token except the last, which is still being typed and
+    matches as a prefix, and the results are intersected.
+    """
+
+    def __init__(self):
+        # name/field tokens never change; info tokens are kept apart so that editing
+        # the info can never drop a message from a token its name or fields provide
+        self._postings = {}
+        self._info_postings = {}
+        self._info_tokens = {}
+        self._sorted_tokens = None
+        # results for prefixes with many postings (the first keystrokes of a type-ahead and
+        # words most messages share), least recently used first
+        self._prefix_cache = {}
+        self._cached_names = 0
+
+    def add_message(self, msg_name, fields, info):
+        tokens = tokenize(msg_name)
+        tokens.add(msg_name.lower())
+        for name, type_name in fields:
+            tokens.update(tokenize(name))
+            tokens.update(tokenize(type_name))
+        self._add_tokens(self._postings, msg_name, tokens)
+        self.set_info(msg_name, info)
+
+    def set_info(self, msg_name, info):
+        old_tokens = self._info_tokens.pop(msg_name, set())
+        new_tokens = tokenize(info or "")
+        for token in old_tokens ^ new_tokens:
+            for i in range(1, len(token) + 1):
+                self._uncache(token[:i])
+        for token in old_tokens - new_tokens:
+            postings = self._info_postings[token]
+            postings.discard(msg_name)
+            if not postings:
+                del self._info_postings[token]
+                if self._sorted_tokens is not None and token not in self._postings:
+                    del self._sorted_tokens[bisect_left(self._sorted_tokens, token)]
+        self._add_tokens(self._info_postings, msg_name, new_tokens - old_tokens)
+        self._info_tokens[msg_name] = new_tokens
+
+    def warm_up(self):
+        # pre-compute the single character prefixes every type-ahead starts with
+        self._sorted_tokens = sorted(self._postings.keys() | self._info_postings.keys())
+        for first in {t[0] for t in self._sorted_tokens}:
+            self._prefix_matches(first)
+
+    def search(self, query):
+        # a set of matching names, which may be shared with the cache: not to be modified
+        words = _WORD_RE.findall(query.lower())
+        if not words:
+            return set()
+        result = self._prefix_matches(words[-1])
+        for word in words[:-1]:
+            if not result:
+                break
+            result = result & (self._postings.get(word, set())
+                               | self._info_postings.get(word, set()))
+        return result
+
+    def _add_tokens(self, postings_dict, msg_name, tokens):
+        for token in tokens:
+            postings = postings_dict.get(token)
+            if postings is None:
+                if (self._sorted_tokens is not None and token not in self._postings
+                        and token not in self._info_postings):
+                    insort(self._sorted_tokens, token)
+                postings_dict[token] = postings = set()
+            postings.add(msg_name)
+
+    def _prefix_matches(self, prefix):
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings.keys() | self._info_postings.keys())
+        cached = self._prefix_cache.pop(prefix, None)
+        if cached is not None:
+            self._prefix_cache[prefix] = cached
+            return cached
+        tokens = self._sorted_tokens
+        start = bisect_left(tokens, prefix)
+        end = bisect_left(tokens, prefix + '\uffff', start)
+        in_range = tokens[start:end]
+        hits = [p for p in map(self._postings.get, in_range) if p is not None]
+        hits.extend(p for p in map(self._info_postings.get, in_range) if p is not None)
+        # largest first: once every message matches, the other postings can add nothing
+        largest = max(hits, key=len, default=())
+        matches = set(largest)
+        if len(matches) < len(self._info_tokens):
+            matches.update(*[h for h in hits if h is not largest])
+        if sum(map(len, hits)) >= _CACHE_MIN_POSTINGS:
+            matches = frozenset(matches)
+            self._prefix_cache[prefix] = matches
+            self._cached_names += len(matches)
+            budget = _CACHE_NAMES_PER_MESSAGE * len(self._info_tokens)
+            while self._cached_names > budget and len(self._prefix_cache) > 1:
+                self._uncache(next(iter(self._prefix_cache)))
+        return matches
+
+    def _uncache(self, prefix):
+        cached = self._prefix_cache.pop(prefix, None)
+        if cached is not None:
+            self._cached_names -= len(cached)
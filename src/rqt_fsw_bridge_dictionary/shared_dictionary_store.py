@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+from python_qt_binding.QtCore import QObject, QTimer, Signal, Slot
+
+from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue
+
+from .bridge_connection import BridgeConnection, discover_bridge_namespaces
+from .dictionary_cache import cache_path, content_hash, load_dictionary_cache
+from .dictionary_cache import save_dictionary_cache
+from .dictionary_ingest import DictionaryIngest
+from .info_journal import journal_path
+from .latency_stats import LatencyStats
+
+
+class SharedDictionaryStore(QObject):
+    """The bridges of one rqt process, shared by every dictionary view in it.
+
+    There is one store per node and one BridgeConnection per bridge namespace, so a
+    dictionary is fetched, cached and held once however many views show it. Views
+    acquire the bridges they show and release them when done; a bridge is shut
+    down with its last release, and the store once its last view detaches.
+    Changes are pushed to every view through the signals below, on the GUI thread.
+    """
+
+    plugin_changed = Signal(str)
+    # a dictionary finished loading; views that show the bridge update their rows
+    dictionary_changed = Signal(str)
+    # the first messages of a bridge's first dictionary, shown while it loads
+    messages_added = Signal(str)
+    # namespace, messages loaded and total, while a dictionary loads
+    load_progress = Signal(str, int, int)
+    # namespace, and whether the load was cancelled
+    load_finished = Signal(str, bool)
+    # the search index and type usage of a newly loaded dictionary are built
+    indexes_ready = Signal(str)
+    info_changed = Signal(str, str)
+    commit_progress = Signal(str, int, int)
+    commit_finished = Signal(str, object)
+    # the service names of the ROS graph, whenever they change
+    graph_changed = Signal(object)
+
+    # bridge responses arrive on the executor thread and are re-emitted through these
+    _plugin_info_received = Signal(str, object)
+    _message_info_received = Signal(str, object, str)
+    # and dictionary chunks on a DictionaryIngest thread
+    _ingest_chunk = Signal(str, object, object, int, int)
+    _ingest_finished = Signal(str, object, bool)
+    # and cached dictionaries on a cache reader thread
+    _cache_loaded = Signal(str, object)
+
+    _stores = {}
+
+    @classmethod
+    def attach(cls, node):
+        store = cls._stores.get(node)
+        if store is None:
+            store = cls(node)
+            cls._stores[node] = store
+        store._views += 1
+        return store
+
+    def __init__(self, node):
+        super(SharedDictionaryStore, self).__init__()
+        self._node = node
+        self._views = 0
+        self._connections = {}
+        self._refs = {}
+        self.stats = LatencyStats()
+        self.service_names = None
+        self._plugin_info_received.connect(self.on_plugin_info_received)
+        self._message_info_received.connect(self.on_message_info_received)
+        self._ingest_chunk.connect(self.on_ingest_chunk)
+        self._ingest_finished.connect(self.on_ingest_finished)
+        self._cache_loaded.connect(self.on_cache_loaded)
+
+        # bridge watch: reacts to changes in the ROS graph cache, contacting absent
+        # bridges with exponential backoff, see BridgeConnection
+        self._timer_wait_for_bridge = QTimer(self)
+        self._timer_wait_for_bridge.timeout.connect(self.wait_for_plugin)
+
+        # latency stats of every view, published once for the process
+        self._diagnostics_pub = self._node.create_publisher(DiagnosticArray, '/diagnostics', 10)
+        self._diagnostics_timer = self._node.create_timer(5.0, self.publish_diagnostics)
+
+    def start(self):
+        if not self._timer_wait_for_bridge.isActive():
+            self._timer_wait_for_bridge.start(250)
+
+    def detach(self):
+        self._views -= 1
+        if self._views > 0:
+            return
+        self._stores.pop(self._node, None)
+        self._timer_wait_for_bridge.stop()
+        self._node.destroy_timer(self._diagnostics_timer)
+        self._node.destroy_publisher(self._diagnostics_pub)
+        for connection in self._connections.values():
+            connection.shutdown()
+        self._connections.clear()
+        self._refs.clear()
+
+    def acquire(self, namespace):
+        namespace = namespace.rstrip('/') or '/'
+        connection = self._connections.get(namespace)
+        if connection is None:
+            connection = BridgeConnection(
+                self._node, namespace, stats=self.stats,
+                on_commit_progress=lambda d, t, ns=namespace: self.commit_progress.emit(ns, d, t),
+                on_commit_finished=lambda f, ns=namespace: self.commit_finished.emit(ns, f))
+            self._connections[namespace] = connection
+        self._refs[namespace] = self._refs.get(namespace, 0) + 1
+        return connection
+
+    def release(self, namespace):
+        refs = self._refs.get(namespace, 0) - 1
+        if refs > 0:
+            self._refs[namespace] = refs
+            return
+        self._refs.pop(namespace, None)
+        connection = self._connections.pop(namespace, None)
+        if connection is not None:
+            connection.shutdown()
+
+    def discover_bridge_namespaces(self):
+        # bridges in the last seen graph, empty before the first poll
+        if self.service_names is None:
+            return []
+        return discover_bridge_namespaces(self._node, self.service_names)
+
+    def publish_diagnostics(self):
+        # runs on the executor thread
+        msg = DiagnosticArray()
+        msg.header.stamp = self._node.get_clock().now().to_msg()
+        for name, count, mean_ms, p50_ms, p95_ms, max_ms in self.stats.snapshot():
+            status = DiagnosticStatus()
+            status.level = DiagnosticStatus.OK
+            status.name = 'rqt_fsw_bridge_dictionary: ' + name
+            status.hardware_id = self._node.get_name()
+            status.message = 'p95 %.3f ms' % p95_ms
+            status.values = [KeyValue(key='count', value=str(count)),
+                             KeyValue(key='mean_ms', value='%.3f' % mean_ms),
+                             KeyValue(key='p50_ms', value='%.3f' % p50_ms),
+                             KeyValue(key='p95_ms', value='%.3f' % p95_ms),
+                             KeyValue(key='max_ms', value='%.3f' % max_ms)]
+            msg.status.append(status)
+        if msg.status:
+            self._diagnostics_pub.publish(msg)
+
+    def load_cached_dictionary(self, connection, plugin_name, msg_pkg):
+        # the cache is unzipped and parsed on a worker thread, and then packed by a
+        # DictionaryIngest like a bridge response
+        if connection.msg_dict or connection.ingest is not None or connection.reading_cache:
+            return
+        connection.reading_cache = True
+        namespace = connection.namespace
+        path = cache_path(namespace, plugin_name, msg_pkg)
+        threading.Thread(target=lambda: self._cache_loaded.emit(
+            namespace, load_dictionary_cache(path)), daemon=True).start()
+
+    @Slot(str, object)
+    def on_cache_loaded(self, namespace, cache):
+        connection = self._connections.get(namespace)
+        if connection is None:
+            return
+        connection.reading_cache = False
+        # a bridge response that came in meanwhile is newer than any cache
+        if cache is None or connection.msg_dict or connection.ingest is not None:
+            return
+        self._node.get_logger().info("showing cached dictionary for: " + cache.plugin_name)
+        self.set_plugin_names(connection, cache.plugin_name, cache.msg_pkg)
+        self.apply_dictionary(connection, cache.messages, cache.digest)
+
+    def save_message_info(self, connection, msg_name, info):
+        connection.dictionary_info.save_message_info(msg_name, info)
+        connection.edit_queue.record(msg_name, info)
+        if connection.journal is not None:
+            try:
+                connection.journal.record(msg_name, info)
+            except OSError as e:
+                self._node.get_logger().warn("could not journal info edit: " + str(e))
+        self.info_changed.emit(connection.namespace, msg_name)
+
+    def info_history(self, connection, msg_name):
+        # saved versions of a message's info, oldest first
+        if connection.journal is None:
+            return []
+        return connection.journal.history(msg_name)
+
+    def revert_message_info(self, connection, msg_name, version):
+        # saves the info of an earlier version again, as a new version
+        journal = connection.journal
+        entry = journal.version(msg_name, version) if journal is not None else None
+        if entry is None:
+            return None
+        self.save_message_info(connection, msg_name, entry.info)
+        return entry.info
+
+    def send_plugin_info_request(self, connection):
+        connection.request_pending = True
+        return connection.client.request_plugin_info(
+            lambda r: self._plugin_info_received.emit(connection.namespace, r))
+
+    def send_get_message_info_request(self, connection):
+        connection.request_pending = True
+        return connection.client.request_message_info(
+            lambda r: self.on_message_info_response(connection, r))
+
+    def on_message_info_response(self, connection, r):
+        # runs on the executor thread: hash and cache the dictionary here, off the GUI thread
+        digest = ""
+        if r:
+            digest = content_hash(r.msg_info)
+            if digest != connection.digest:
+                try:
+                    save_dictionary_cache(cache_path(connection.namespace,
+                                                     connection.plugin_name,
+                                                     connection.msg_pkg_name),
+                                          connection.plugin_name, connection.msg_pkg_name,
+                                          r.msg_info, digest)
+                except OSError as e:
+                    self._node.get_logger().warn("could not write dictionary cache: " + str(e))
+        self._message_info_received.emit(connection.namespace, r, digest)
+
+    @Slot()
+    def wait_for_plugin(self):
+        # the graph cache is local, so this is cheap; bridges are only contacted when it
+        # changed or their backoff ran out
+        service_names = frozenset(name for name, _ in self._node.get_service_names_and_types())
+        if service_names != self.service_names:
+            self.service_names = service_names
+            self.graph_changed.emit(service_names)
+            for connection in self._connections.values():
+                connection.reset_backoff()
+
+        # every bridge is handled on its own, so one slow bridge never delays the others
+        now = time.monotonic()
+        for connection in list(self._connections.values()):
+            ready = connection.services_ready()
+            if connection.load_cancelled:
+                if ready:
+                    continue
+                connection.load_cancelled = False
+            if connection.connected:
+                if not ready:
+                    self._node.get_logger().warn("lost FSW bridge at " + connection.namespace)
+                    connection.disconnect()
+                continue
+            if connection.request_pending or not connection.attempt_due(now):
+                continue
+            connection.schedule_retry(now)
+            if not ready:
+                continue
+            self._node.get_logger().info("Trying to connect to FSW bridge at "
+                                         + connection.namespace + "...")
+            if connection.plugin_info is None:
+                self.send_plugin_info_request(connection)
+            else:
+                self.send_get_message_info_request(connection)
+
+    @Slot(str, object)
+    def on_plugin_info_received(self, namespace, plugin_info):
+        connection = self._connections.get(namespace)
+        if connection is None:
+            return
+        connection.request_pending = False
+        if plugin_info is None:
+            return
+        connection.plugin_info = plugin_info
+        self.set_plugin_names(connection, plugin_info.plugin_name, plugin_info.msg_pkg)
+
+        if connection.client.get_message_info_ready() and not connection.load_cancelled:
+            self.send_get_message_info_request(connection)
+
+    def set_plugin_names(self, connection, plugin_name, msg_pkg):
+        connection.set_plugin_names(plugin_name, msg_pkg)
+
+        self._node.get_logger().info("setting plugin: " + connection.plugin_name)
+        self._node.get_logger().info("setting plugin pkg: " + connection.plugin_pkg_name)
+        self._node.get_logger().info("setting msg pkg: " + connection.msg_pkg_name)
+        try:
+            connection.open_journal(journal_path(connection.namespace, connection.plugin_name,
+                                                 connection.msg_pkg_name))
+        except OSError as e:
+            self._node.get_logger().warn("could not open info journal: " + str(e))
+        self.plugin_changed.emit(connection.namespace)
+
+    @Slot(str, object, str)
+    def on_message_info_received(self, namespace, r, digest):
+        connection = self._connections.get(namespace)
+        if connection is None:
+            return
+        connection.request_pending = False
+        # a response that was already on its way when the load was cancelled is dropped
+        if not r or connection.load_cancelled:
+            return
+        connection.connected = True
+        loading = connection.ingest
+        if digest == connection.digest or (loading is not None and digest == loading.digest):
+            self._node.get_logger().info("cached dictionary is up to date for: " + namespace)
+            return
+        self._node.get_logger().info("setting msg info for " + namespace + " with: "
+                                     + str(len(r.msg_info)) + " messages")
+        self.apply_dictionary(connection, r.msg_info, digest)
+
+    def apply_dictionary(self, connection, message_info_list, digest):
+        # the messages are packed in chunks on a worker thread and merged here as they
+        # come, so a large dictionary never blocks the GUI; a load still running for
+        # the bridge is cancelled first
+        if connection.ingest is not None:
+            self.cancel_load(connection, user=False)
+        namespace = connection.namespace
+        connection.dictionary_info.begin_load(connection.plugin_pkg_name,
+                                              connection.msg_pkg_name)
+        ingest = DictionaryIngest(
+            message_info_list, digest,
+            on_chunk=lambda part, done, total: self._ingest_chunk.emit(
+                namespace, ingest, part, done, total),
+            on_finished=lambda cancelled: self._ingest_finished.emit(
+                namespace, ingest, cancelled))
+        connection.ingest = ingest
+        self.load_progress.emit(namespace, 0, ingest.total)
+        ingest.start()
+
+    def cancel_load(self, connection, user=True):
+        # a load the user cancelled stays cancelled until reload_dictionary(), see
+        # BridgeConnection.load_cancelled; one replaced by a newer response does not
+        ingest = connection.ingest
+        if ingest is None:
+            return
+        ingest.cancel()
+        connection.ingest = None
+        connection.load_cancelled = user
+        if connection.dictionary_info.cancel_load():
+            # the messages loaded so far stay, but the next response is loaded in full
+            connection.digest = ""
+            self.install_dictionary(connection)
+        self.load_finished.emit(connection.namespace, True)
+
+    def reload_dictionary(self, connection):
+        # fetches the dictionary again after a cancelled load
+        connection.load_cancelled = False
+        connection.connected = False
+        connection.reset_backoff()
+
+    @Slot(str, object, object, int, int)
+    def on_ingest_chunk(self, namespace, ingest, part, done, total):
+        connection = self._connections.get(namespace)
+        if connection is None or connection.ingest is not ingest:
+            return
+        with self.stats.timer('dictionary.merge_chunk'):
+            shown = connection.dictionary_info.add_loaded(part)
+            if shown:
+                connection.msg_dict = connection.dictionary_info.get_message_dict()
+        if shown:
+            self.messages_added.emit(namespace)
+        self.load_progress.emit(namespace, done, total)
+
+    @Slot(str, object, bool)
+    def on_ingest_finished(self, namespace, ingest, cancelled):
+        connection = self._connections.get(namespace)
+        if connection is None or connection.ingest is not ingest or cancelled:
+            return
+        connection.ingest = None
+        connection.digest = ingest.digest
+        connection.dictionary_info.finish_load()
+        self.install_dictionary(connection)
+        self.stats.record('dictionary.load', time.perf_counter_ns() - ingest.started_ns)
+        self.load_finished.emit(namespace, False)
+
+    def install_dictionary(self, connection):
+        connection.struct_layouts = {}
+        connection.msg_dict = connection.dictionary_info.get_message_dict()
+        if connection.journal is not None:
+            # edits that never reached the bridge, e.g. from before a crash, are shown
+            # again and queued for the next commit
+            for msg_name, info in connection.journal.pending().items():
+                if connection.dictionary_info.has_message(msg_name):
+                    connection.dictionary_info.save_message_info(msg_name, info)
+                    connection.edit_queue.record(msg_name, info)
+        if connection.msg_dict:
+            threading.Thread(target=self.build_indexes, args=(connection,),
+                             daemon=True).start()
+        self.dictionary_changed.emit(connection.namespace)
+
+    def build_indexes(self, connection):
+        # runs on a worker thread
+        connection.dictionary_info.build_indexes()
+        self.indexes_ready.emit(connection.namespace)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+# Field type expressions as the bridges send them in the struct json:
+#
+#   type     := base suffix*
+#   base     := 'sequence' '<' type [',' INT] '>'
+#             | ('string' | 'wstring') ['<=' INT]
+#             | NAME ('/' NAME)*
+#   suffix   := '[' ['<='] [INT] ']'
+#
+# Each distinct string is parsed once into an immutable, hashable type object.
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+
+# wire size in bytes of every fixed-size primitive the bridges use
+PRIMITIVE_SIZES = {
+    "bool": 1, "boolean": 1, "byte": 1, "char": 1, "octet": 1,
+    "int8": 1, "uint8": 1, "float8": 1,
+    "int16": 2, "uint16": 2, "float16": 2, "wchar": 2,
+    "int32": 4, "uint32": 4, "float32": 4, "float": 4,
+    "int64": 8, "uint64": 8, "float64": 8, "double": 8,
+}
+
+PRIMITIVE_TYPES = frozenset(PRIMITIVE_SIZES) | {"string", "wstring"}
+
+_TOKEN_RE = re.compile(r'\s*(?:(<=)|([A-Za-z_][A-Za-z0-9_]*)|(\d+)|(\S))')
+
+
+class PrimitiveType(namedtuple('PrimitiveType', ['name'])):
+    __slots__ = ()
+
+    def __str__(self):
+        return self.name
+
+
+class StringType(namedtuple('StringType', ['name', 'bound'])):
+    __slots__ = ()
+
+    def __str__(self):
+        return self.name if self.bound is None else self.name + "<=" + str(self.bound)
+
+
+class MessageType(namedtuple('MessageType', ['pkg', 'name'])):
+    # pkg is None for a bare type name
+    __slots__ = ()
+
+    def __str__(self):
+        return self.name if self.pkg is None else self.pkg + "/" + self.name
+
+
+class SequenceType(namedtuple('SequenceType', ['element', 'bound'])):
+    # sequence<T>, sequence<T, N>, T[] and T[<=N]; bound is None when unbounded
+    __slots__ = ()
+
+    def __str__(self):
+        if self.bound is None:
+            return "sequence<" + str(self.element) + ">"
+        return "sequence<" + str(self.element) + ", " + str(self.bound) + ">"
+
+
+class ArrayType(namedtuple('ArrayType', ['element', 'length'])):
+    __slots__ = ()
+
+    def __str__(self):
+        return str(self.element) + "[" + str(self.length) + "]"
+
+
+class UnknownType(namedtuple('UnknownType', ['text'])):
+    # anything the grammar does not cover; shown as is and never resolved
+    __slots__ = ()
+
+    def __str__(self):
+        return self.text
+
+
+class _Parser:
+    def __init__(self, text):
+        self._tokens = []
+        for m in _TOKEN_RE.finditer(text):
+            le, name, number, other = m.groups()
+            if le:
+                self._tokens.append(('<=', le))
+            elif name:
+                self._tokens.append(('name', name))
+            elif number:
+                self._tokens.append(('int', int(number)))
+            elif other:
+                self._tokens.append((other, other))
+        self._pos = 0
+
+    def _peek(self):
+        return self._tokens[self._pos][0] if self._pos < len(self._tokens) else None
+
+    def _take(self, kind):
+        if self._peek() != kind:
+            raise ValueError("expected " + kind)
+        value = self._tokens[self._pos][1]
+        self._pos += 1
+        return value
+
+    def parse(self):
+        t = self._type()
+        if self._peek() is not None:
+            raise ValueError("trailing input")
+        return t
+
+    def _type(self):
+        t = self._base()
+        while self._peek() == '[':
+            self._take('[')
+            bounded = self._peek() == '<='
+            if bounded:
+                self._take('<=')
+            length = self._take('int') if self._peek() == 'int' else None
+            self._take(']')
+            if length is None or bounded:
+                t = SequenceType(t, length)
+            else:
+                t = ArrayType(t, length)
+        return t
+
+    def _base(self):
+        name = self._take('name')
+        if name == 'sequence' and self._peek() == '<':
+            self._take('<')
+            element = self._type()
+            bound = None
+            if self._peek() == ',':
+                self._take(',')
+                bound = self._take('int')
+            self._take('>')
+            return SequenceType(element, bound)
+        if name in ('string', 'wstring'):
+            bound = None
+            if self._peek() == '<=':
+                self._take('<=')
+                bound = self._take('int')
+            return StringType(name, bound)
+        if name in PRIMITIVE_SIZES and self._peek() != '/':
+            return PrimitiveType(name)
+        parts = [name]
+        while self._peek() == '/':
+            self._take('/')
+            parts.append(self._take('name'))
+        if len(parts) == 1:
+            return MessageType(None, name)
+        # 'pkg/Type' and 'pkg/msg/Type'
+        return MessageType(parts[0], parts[-1])
+
+
+@lru_cache(maxsize=4096)
+def parse_type(text):
+    try:
+        return _Parser(text).parse()
+    except ValueError:
+        return UnknownType(text.strip())
+
+
+def unwrap_collections(t):
+    # (innermost element type, suffix), e.g. sequence<pkg/Foo[4]> -> (pkg/Foo, '[4][]')
+    suffix = ""
+    while isinstance(t, (SequenceType, ArrayType)):
+        if isinstance(t, ArrayType):
+            suffix = "[" + str(t.length) + "]" + suffix
+        elif t.bound is None:
+            suffix = "[]" + suffix
+        else:
+            suffix = "[<=" + str(t.bound) + "]" + suffix
+        t = t.element
+    return t, suffix
+
+
+def resolve_message(t, msg_pkg, msg_names):
+    """Name of the dictionary message the innermost element of ``t`` refers to.
+
+    A type only resolves when it carries no package or the dictionary's own
+    ``msg_pkg``, so a same-named type from another package never matches.
+    Returns None for primitives, strings and types the dictionary does not define.
+    """
+    t, _ = unwrap_collections(t)
+    if not isinstance(t, MessageType):
+        return None
+    if t.pkg is not None and msg_pkg and t.pkg != msg_pkg:
+        return None
+    return t.name if t.name in msg_names else None
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+
+class TypeUsageIndex:
+    """Which types a message embeds, and which messages embed a type.
+
+    Direct edges in both directions are stored when the dictionary is loaded.
+    Transitive closures are walked the first time they are asked for and then
+    memoized, so every query after the first is a dict lookup. Cycles are fine:
+    a type on a cycle simply shows up among its own users and dependencies.
+    """
+
+    def __init__(self):
+        self._uses = {}
+        self._users = {}
+        self._transitive_uses = {}
+        self._transitive_users = {}
+
+    def add_message(self, msg_name, used_types):
+        uses = tuple(sorted(set(used_types)))
+        self._uses[msg_name] = uses
+        for type_name in uses:
+            self._users.setdefault(type_name, []).append(msg_name)
+
+    def __contains__(self, type_name):
+        return type_name in self._uses or type_name in self._users
+
+    def dependencies(self, type_name):
+        return self._uses.get(type_name, ())
+
+    def users(self, type_name):
+        return tuple(self._users.get(type_name, ()))
+
+    def transitive_dependencies(self, type_name):
+        return self._closure(type_name, self._uses, self._transitive_uses)
+
+    def transitive_users(self, type_name):
+        return self._closure(type_name, self._users, self._transitive_users)
+
+    def components(self):
+        """Strongly connected components of the dependency graph, dependencies first.
+
+        Every type not on a cycle is a component of its own. Iterative Tarjan, so deep
+        nesting cannot hit the recursion limit.
+        """
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root in self._uses:
+            if root in index:
+                continue
+            work = [(root, iter(self._uses.get(root, ())))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, deps = work[-1]
+                for dep in deps:
+                    if dep not in index:
+                        index[dep] = low[dep] = len(index)
+                        stack.append(dep)
+                        on_stack.add(dep)
+                        work.append((dep, iter(self._uses.get(dep, ()))))
+                        break
+                    if dep in on_stack:
+                        low[node] = min(low[node], index[dep])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        return components
+
+    def _closure(self, type_name, edges, memo):
+        closure = memo.get(type_name)
+        if closure is not None:
+            return closure
+        seen = set()
+        stack = list(edges.get(type_name, ()))
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            known = memo.get(name)
+            if known is not None:
+                seen.update(known)
+            else:
+                stack.extend(edges.get(name, ()))
+        closure = frozenset(seen)
+        memo[type_name] = closure
+        return closure
@@ -0,0 +1,29 @@
+from python_qt_binding.QtWidgets import QDialog, QDialogButtonBox
+from python_qt_binding.QtWidgets import QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem
+
+
+class TypeUsageDialog(QDialog):
+    def __init__(self, type_name, type_usage, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle("ROS2-FSW Bridge Type Usage")
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close)
+        self.buttonBox.rejected.connect(self.reject)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        groups = [("used directly by", type_usage.users(type_name)),
+                  ("used by", type_usage.transitive_users(type_name)),
+                  ("depends on", type_usage.transitive_dependencies(type_name))]
+        for label, names in groups:
+            group = QTreeWidgetItem([label + " (" + str(len(names)) + ")"])
+            group.addChildren([QTreeWidgetItem([name]) for name in sorted(names)])
+            self.tree.addTopLevelItem(group)
+        self.tree.topLevelItem(0).setExpanded(True)
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(QLabel("Type usage of \'" + type_name + "\'"))
+        self.layout.addWidget(self.tree)
+        self.layout.addWidget(self.buttonBox)
+        self.setLayout(self.layout)
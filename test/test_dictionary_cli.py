@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+from rqt_fsw_bridge_dictionary import dictionary_cli
+from rqt_fsw_bridge_dictionary.dictionary_cache import CachedMessageInfo
+
+
+MESSAGES = [
+    CachedMessageInfo('HK_TLM', MessageInfo.TELEMETRY, '{"count": "uint16"}', 'housekeeping'),
+    CachedMessageInfo('NOOP_CMD', MessageInfo.COMMAND, '{"code": "uint8"}', 'does, nothing'),
+    CachedMessageInfo('RESET_CMD', MessageInfo.COMMAND, '{}', ''),
+    CachedMessageInfo('Header', MessageInfo.HELPER, '{"seq": "uint32"}', ''),
+]
+
+
+class _FakeService:
+    def __init__(self, srv_name):
+        self.srv_name = srv_name
+
+    def wait_for_service(self, timeout_sec=None):
+        return True
+
+
+class FakeBridgeClient:
+    """Answers the dictionary requests right away, without a bridge."""
+
+    def __init__(self, node, namespace):
+        self.plugin_info_client = _FakeService(namespace + '/get_plugin_info')
+        self.get_message_info_client = _FakeService(namespace + '/get_message_info')
+
+    def request_plugin_info(self, callback, timeout_sec=5.0):
+        callback(SimpleNamespace(plugin_name='cfe_plugin.cfe', msg_pkg='cfe_msgs'))
+
+    def request_message_info(self, callback, timeout_sec=30.0):
+        callback(SimpleNamespace(msg_info=MESSAGES))
+
+    def shutdown(self):
+        pass
+
+
+def run_export(path, *args):
+    # runs `fsw_bridge_dictionary export` against the fake bridge; returns (status, output)
+    client = dictionary_cli.BridgeClient
+    dictionary_cli.BridgeClient = FakeBridgeClient
+    try:
+        status = dictionary_cli.main(['fsw_bridge_dictionary', 'export', '-o', path] +
+                                     list(args))
+    finally:
+        dictionary_cli.BridgeClient = client
+    with open(path, newline='', encoding='utf-8') as f:
+        return status, f.read()
+
+
+def names(output):
+    return [json.loads(line)['name'] for line in output.splitlines()]
+
+
+def test_export_jsonl(tmp_path):
+    status, output = run_export(str(tmp_path / 'dictionary.jsonl'))
+    assert status == 0
+    records = [json.loads(line) for line in output.splitlines()]
+    assert [r['name'] for r in records] == ['HK_TLM', 'NOOP_CMD', 'RESET_CMD', 'Header']
+    assert records[1] == {'name': 'NOOP_CMD', 'type': 'COMMAND', 'pkg': 'cfe_msgs',
+                          'info': 'does, nothing', 'json': '{"code": "uint8"}'}
+
+
+def test_export_csv(tmp_path):
+    status, output = run_export(str(tmp_path / 'dictionary.csv'), '--format', 'csv')
+    assert status == 0
+    rows = list(csv.DictReader(io.StringIO(output, newline='')))
+    assert [r['name'] for r in rows] == ['HK_TLM', 'NOOP_CMD', 'RESET_CMD', 'Header']
+    assert rows[1] == {'name': 'NOOP_CMD', 'type': 'COMMAND', 'pkg': 'cfe_msgs',
+                       'info': 'does, nothing', 'json': '{"code": "uint8"}'}
+
+
+def test_export_filters(tmp_path):
+    path = str(tmp_path / 'dictionary.jsonl')
+    assert names(run_export(path, '--type', 'command')[1]) == ['NOOP_CMD', 'RESET_CMD']
+    assert names(run_export(path, '--name', '*_TLM', '--name', 'Head*')[1]) == [
+        'HK_TLM', 'Header']
+    assert run_export(path, '--name', '*_CMD', '--type', 'telemetry')[1] == ''
+
+
+def test_cli_does_not_import_qt(tmp_path):
+    # in a fresh interpreter, as other tests of this package load Qt
+    code = ('import sys; sys.path.insert(0, %r); import test_dictionary_cli; '
+            'status, output = test_dictionary_cli.run_export(%r); '
+            'assert status == 0 and output; '
+            "print(sorted(m for m in sys.modules if m.split('.')[0] in "
+            "('PyQt5', 'python_qt_binding', 'rqt_gui', 'qt_gui')))"
+            % (os.path.dirname(os.path.abspath(__file__)), str(tmp_path / 'out.jsonl')))
+    result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    assert result.stdout.splitlines()[-1] == '[]'
@@ -0,0 +1,145 @@
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from python_qt_binding.QtCore import QtMsgType, qInstallMessageHandler  # noqa: E402
+from python_qt_binding.QtTest import QAbstractItemModelTester  # noqa: E402
+from python_qt_binding.QtWidgets import QApplication, QTreeView  # noqa: E402
+
+from rqt_fsw_bridge_dictionary.dictionary_tree_model import DictionaryTreeModel  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def qt_warnings():
+    # QAbstractItemModelTester reports every inconsistency as a Qt warning
+    messages = []
+
+    def handler(msg_type, context, text):
+        if msg_type != QtMsgType.QtDebugMsg:
+            messages.append(text)
+
+    qInstallMessageHandler(handler)
+    yield messages
+    qInstallMessageHandler(None)
+
+
+def make_dict(commands, telemetry=(), helper=()):
+    return {'commands': list(commands), 'telemetry': list(telemetry), 'helper': list(helper)}
+
+
+def shown_names(model, bridge=None):
+    # {category: names of the fetched rows}, for one bridge of a multi-bridge model
+    result = {}
+    for index in model.category_indexes():
+        node = model._node(index)
+        if node.names is None or (bridge is not None and node.bridge != bridge):
+            continue
+        result[node.name] = [model.message_name(model.index(row, 0, index))
+                             for row in range(model.rowCount(index))]
+    return result
+
+
+def checked_model(app, fetch_batch_size=4):
+    model = DictionaryTreeModel(fetch_batch_size=fetch_batch_size)
+    # parented to the model, so the tester never outlives it
+    tester = QAbstractItemModelTester(
+        model, QAbstractItemModelTester.FailureReportingMode.Warning, model)
+    return model, tester
+
+
+def fetch_all(model):
+    for index in model.category_indexes():
+        while model.canFetchMore(index):
+            model.fetchMore(index)
+
+
+def test_node_index_matches_index(app, qt_warnings):
+    model, _ = checked_model(app)
+    model.set_dictionary(make_dict(['a', 'b'], ['t']), 'one')
+    for category in model._roots:
+        assert model._node_index(category) == model.index(category.row, 0)
+    model.set_dictionary(make_dict(['x']), 'two')
+    for root in model._roots:
+        root_index = model.index(root.row, 0)
+        assert model._node_index(root) == root_index
+        for category in root.children:
+            index = model._node_index(category)
+            assert index == model.index(category.row, 0, root_index)
+            assert model.parent(index) == root_index
+    assert qt_warnings == []
+
+
+def test_update_inserts_and_removes_rows(app, qt_warnings):
+    model, _ = checked_model(app)
+    model.set_dictionary(make_dict(['a', 'b', 'c', 'd'], ['t1', 't2']))
+    fetch_all(model)
+    model.update_dictionary(make_dict(['a', 'new', 'c', 'd', 'e'], ['t2']))
+    fetch_all(model)
+    assert shown_names(model) == {'commands': ['a', 'new', 'c', 'd', 'e'],
+                                  'telemetry': ['t2'], 'helper': []}
+    assert qt_warnings == []
+
+
+def test_update_reordered_category(app, qt_warnings):
+    model, _ = checked_model(app)
+    model.set_dictionary(make_dict(['a', 'b', 'c']))
+    fetch_all(model)
+    model.update_dictionary(make_dict(['c', 'b', 'a']))
+    fetch_all(model)
+    assert shown_names(model)['commands'] == ['c', 'b', 'a']
+    assert qt_warnings == []
+
+
+def test_append_shows_one_batch(app, qt_warnings):
+    # without the tester, which fetches everything it is told about
+    model = DictionaryTreeModel(fetch_batch_size=4)
+    model.set_dictionary(make_dict([]))
+    names = ['m%d' % i for i in range(10)]
+    model.update_dictionary(make_dict(names))
+    category = model.category_indexes()[0]
+    assert model.rowCount(category) == 4
+    assert model.canFetchMore(category)
+    fetch_all(model)
+    assert shown_names(model)['commands'] == names
+    assert qt_warnings == []
+
+
+def test_update_one_of_several_bridges(app, qt_warnings):
+    model, _ = checked_model(app)
+    model.set_dictionary(make_dict(['a', 'b']), 'one')
+    model.set_dictionary(make_dict(['x', 'y']), 'two')
+    fetch_all(model)
+    model.update_dictionary(make_dict(['a', 'c']), 'two')
+    fetch_all(model)
+    assert shown_names(model, 'one')['commands'] == ['a', 'b']
+    assert shown_names(model, 'two')['commands'] == ['a', 'c']
+    assert model.message_ref(model.index(1, 0, model.category_indexes()[5])) == ('two', 'c')
+    assert qt_warnings == []
+
+
+def test_view_keeps_expansion_across_update(app, qt_warnings):
+    model, _ = checked_model(app)
+    view = QTreeView()
+    view.setModel(model)
+    model.set_dictionary(make_dict(['a', 'b']))
+    category = model.category_indexes()[0]
+    view.expand(category)
+    fetch_all(model)
+    model.update_dictionary(make_dict(['a', 'b', 'c']))
+    category_node = model._roots[0]
+    assert view.isExpanded(model._node_index(category_node))
+    view.resize(200, 400)
+    view.show()
+    app.processEvents()
+    new_row = model.index(2, 0, category)
+    assert model.message_name(new_row) == 'c'
+    assert not view.visualRect(new_row).isEmpty()
+    view.close()
+    assert qt_warnings == []
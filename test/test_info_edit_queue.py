@@ -0,0 +1,103 @@
+import threading
+
+from rqt_fsw_bridge_dictionary.info_edit_queue import InfoEditQueue
+
+
+class FakeBridgeClient:
+    """Answers SetMessageInfo requests right away, failing the first ``failures[name]``."""
+
+    def __init__(self, failures=None, hold=False):
+        self.failures = dict(failures or {})
+        self.requests = []
+        # with hold, callbacks wait in held until the test answers them
+        self.hold = hold
+        self.held = []
+
+    def request_set_message_info(self, pkg_name, msg_name, info, callback):
+        self.requests.append((pkg_name, msg_name, info))
+        if self.hold:
+            self.held.append(callback)
+            return
+        failures = self.failures.get(msg_name, 0)
+        self.failures[msg_name] = failures - 1
+        callback(failures <= 0)
+
+
+def make_queue(client, **kwargs):
+    finished = threading.Event()
+    result = {'committed': [], 'progress': []}
+
+    def on_finished(failed):
+        result['failed'] = failed
+        finished.set()
+
+    queue = InfoEditQueue(client, retry_delay_sec=0.0, on_finished=on_finished,
+                          on_progress=lambda d, t: result['progress'].append((d, t)),
+                          on_committed=lambda n, i: result['committed'].append((n, i)),
+                          **kwargs)
+    return queue, finished, result
+
+
+def test_flush_sends_latest_info():
+    client = FakeBridgeClient()
+    queue, finished, result = make_queue(client)
+    queue.record('Foo', 'one')
+    queue.record('Foo', 'two')
+    queue.record('Bar', 'bar')
+    assert queue.pending_count() == 2
+    assert queue.flush('cfe_msgs')
+    assert finished.wait(5.0)
+    assert result['failed'] == []
+    assert sorted(client.requests) == [('cfe_msgs', 'Bar', 'bar'), ('cfe_msgs', 'Foo', 'two')]
+    assert sorted(result['committed']) == [('Bar', 'bar'), ('Foo', 'two')]
+    assert result['progress'][-1] == (2, 2)
+    assert queue.pending_count() == 0
+    assert not queue.is_flushing()
+    # nothing left to send
+    assert not queue.flush('cfe_msgs')
+
+
+def test_retry():
+    client = FakeBridgeClient(failures={'Foo': 2})
+    queue, finished, result = make_queue(client, max_retries=3)
+    queue.record('Foo', 'one')
+    queue.flush('cfe_msgs')
+    assert finished.wait(5.0)
+    assert result['failed'] == []
+    assert len(client.requests) == 3
+    assert result['committed'] == [('Foo', 'one')]
+    assert queue.pending_count() == 0
+
+
+def test_failure_keeps_edit_queued():
+    client = FakeBridgeClient(failures={'Foo': 10})
+    queue, finished, result = make_queue(client, max_retries=2)
+    queue.record('Foo', 'one')
+    queue.record('Bar', 'bar')
+    queue.flush('cfe_msgs')
+    assert finished.wait(5.0)
+    assert result['failed'] == ['Foo']
+    assert [r[1] for r in client.requests].count('Foo') == 3
+    assert result['committed'] == [('Bar', 'bar')]
+    assert result['progress'][-1] == (2, 2)
+    assert queue.pending_count() == 1
+    # the next flush tries again
+    client.failures['Foo'] = 0
+    finished.clear()
+    assert queue.flush('cfe_msgs')
+    assert finished.wait(5.0)
+    assert result['failed'] == []
+    assert queue.pending_count() == 0
+
+
+def test_edit_during_flush_stays_queued():
+    client = FakeBridgeClient(hold=True)
+    queue, finished, result = make_queue(client)
+    queue.record('Foo', 'one')
+    queue.flush('cfe_msgs')
+    assert queue.is_flushing()
+    queue.record('Foo', 'two')
+    client.held.pop()(True)
+    assert finished.wait(5.0)
+    assert result['committed'] == [('Foo', 'one')]
+    assert queue.pending_count() == 1
@@ -0,0 +1,84 @@
+import os
+
+from rqt_fsw_bridge_dictionary.info_journal import InfoJournal
+
+
+def infos(journal, msg_name):
+    return [entry.info for entry in journal.history(msg_name)]
+
+
+def test_replay(tmp_path):
+    path = str(tmp_path / 'bridge.journal')
+    journal = InfoJournal(path).open()
+    assert journal.record('Foo', 'one') == 1
+    assert journal.record('Foo', 'two') == 2
+    assert journal.record('Bar', 'bar') == 3
+    journal.mark_committed('Foo', 'two')
+    journal.close()
+
+    journal = InfoJournal(path).open()
+    assert infos(journal, 'Foo') == ['one', 'two']
+    assert [e.committed for e in journal.history('Foo')] == [False, True]
+    assert journal.version('Bar', 3).info == 'bar'
+    assert journal.pending() == {'Bar': 'bar'}
+    # versions continue where the log left off
+    assert journal.record('Bar', 'bar 2') == 4
+    journal.close()
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / 'bridge.journal')
+    journal = InfoJournal(path).open()
+    journal.record('Foo', 'one')
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('["e",2,1.0,"Foo","tw')
+
+    journal = InfoJournal(path).open()
+    assert infos(journal, 'Foo') == ['one']
+    with open(path, 'rb') as f:
+        assert f.read().endswith(b'\n')
+    # the next record is not glued onto the torn one
+    assert journal.record('Foo', 'two') == 2
+    journal.close()
+    journal = InfoJournal(path).open()
+    assert infos(journal, 'Foo') == ['one', 'two']
+    journal.close()
+
+
+def test_compaction(tmp_path):
+    path = str(tmp_path / 'bridge.journal')
+    journal = InfoJournal(path, compact_after=5, keep_versions=3).open()
+    for i in range(7):
+        journal.record('Foo', str(i))
+    journal.mark_committed('Foo', '6')
+    assert os.path.exists(path + '.snapshot')
+    journal.close()
+    assert os.path.getsize(path) < 200
+
+    journal = InfoJournal(path, compact_after=5, keep_versions=3).open()
+    assert infos(journal, 'Foo') == ['4', '5', '6']
+    assert journal.history('Foo')[-1].committed
+    assert journal.pending() == {}
+    assert journal.record('Foo', '7') == 8
+    journal.close()
+
+
+def test_crash_between_snapshot_and_log_cut(tmp_path):
+    # the snapshot is written but the log still holds the records it contains
+    path = str(tmp_path / 'bridge.journal')
+    journal = InfoJournal(path, compact_after=1000).open()
+    journal.record('Foo', 'one')
+    journal.record('Foo', 'two')
+    journal.sync()
+    with open(path, 'rb') as f:
+        log = f.read()
+    journal.compact()
+    journal.close()
+    with open(path, 'wb') as f:
+        f.write(log)
+
+    journal = InfoJournal(path).open()
+    assert [e.version for e in journal.history('Foo')] == [1, 2]
+    assert journal.record('Foo', 'three') == 3
+    journal.close()
@@ -0,0 +1,121 @@
+import json
+import logging
+import sys
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+from rqt_fsw_bridge_dictionary.dictionary_cache import CachedMessageInfo
+from rqt_fsw_bridge_dictionary.dictionary_info import DictionaryInfo
+from rqt_fsw_bridge_dictionary.message_store import MessageStore
+
+
+class _Node:
+    # all DictionaryInfo needs of a node is its logger
+    def get_logger(self):
+        return logging.getLogger('test_message_store')
+
+
+def message(name, msg_type=MessageInfo.TELEMETRY, fields=None, info=""):
+    return CachedMessageInfo(name, msg_type, json.dumps(fields or {'a': 'uint8'}), info)
+
+
+def test_columns():
+    store = MessageStore([
+        message('Hk', fields={'count': 'uint16'}, info='housekeeping, 25 °C'),
+        message('Noop', MessageInfo.COMMAND),
+        message('Header', MessageInfo.HELPER, info=None),
+    ])
+    assert len(store) == 3
+    assert store.names() == ['Hk', 'Noop', 'Header']
+    assert [store.kind(n) for n in store.names()] == ['TELEMETRY', 'COMMAND', 'HELPER']
+    assert store.struct_bytes('Hk') == b'{"count": "uint16"}'
+    assert store.info('Hk') == 'housekeeping, 25 °C'
+    assert store.info('Header') == ''
+    assert 'Noop' in store
+    assert 'Missing' not in store
+
+
+def test_names_are_interned():
+    # names built at run time, so only interning makes them the same object
+    store = MessageStore([message(''.join(['Hk', '_TLM']))])
+    assert store.names()[0] is sys.intern(''.join(['Hk_', 'TLM']))
+
+
+def test_repeated_name_replaces_in_place():
+    store = MessageStore([message('Hk', info='old'), message('Noop'),
+                          message('Hk', MessageInfo.HELPER, info='new')])
+    assert store.names() == ['Hk', 'Noop']
+    assert store.info('Hk') == 'new'
+    assert store.kind('Hk') == 'HELPER'
+
+
+def test_struct_decoded_on_first_use():
+    dictionary_info = DictionaryInfo(_Node(), struct_cache_size=2)
+    dictionary_info.init('cfe_plugin', 'cfe_msgs', [
+        message('Hk', fields={'header': 'cfe_msgs/Header', 'count': 'uint16'}),
+        message('Noop', MessageInfo.COMMAND, {'header': 'cfe_msgs/Header'}),
+        message('Header', MessageInfo.HELPER, {'seq': 'uint32'}),
+    ])
+    # nothing is parsed until a message is looked at
+    assert len(dictionary_info._struct_cache) == 0
+    hk = dictionary_info.get_message_fields('Hk')
+    assert [(f.name, f.type) for f in hk] == [('header', 'cfe_msgs/Header'),
+                                              ('count', 'uint16')]
+    assert dictionary_info.get_message_fields('Hk') is hk
+    # field and type names are shared between messages
+    noop = dictionary_info.get_message_fields('Noop')
+    assert noop[0].name is hk[0].name
+    assert noop[0].type is hk[0].type
+    # the cache is bounded; an evicted message is parsed again from the store
+    dictionary_info.get_message_fields('Header')
+    assert list(dictionary_info._struct_cache) == ['Noop', 'Header']
+    assert dictionary_info.get_message_fields('Hk') == hk
+    assert dictionary_info.get_message_fields('Missing') == ()
+
+
+def test_chunked_extend_and_freeze():
+    store = MessageStore()
+    chunks = [[message('Msg%d' % i, info='info %d' % i) for i in range(start, start + 3)]
+              for start in (0, 3, 6)]
+    for chunk in chunks:
+        store.extend(MessageStore(chunk))
+        # the blobs grow in place, lookups still hand out bytes
+        assert isinstance(store._structs, bytearray)
+        assert isinstance(store.struct_bytes('Msg0'), bytes)
+    # a later chunk may resend a message
+    store.extend(MessageStore([message('Msg4', MessageInfo.COMMAND, {'b': 'int8'}, 'again')]))
+    assert store.freeze() is store
+    assert isinstance(store._structs, bytes)
+    assert isinstance(store._infos, bytes)
+
+    assert store.names() == ['Msg%d' % i for i in range(9)]
+    assert store.info('Msg8') == 'info 8'
+    assert store.struct_bytes('Msg8') == b'{"a": "uint8"}'
+    assert (store.kind('Msg4'), store.info('Msg4')) == ('COMMAND', 'again')
+    assert store.struct_bytes('Msg4') == b'{"b": "int8"}'
+    # a frozen store can still be extended, e.g. by a reload into a copy
+    store.extend(MessageStore([message('Msg9')]))
+    assert store.names()[-1] == 'Msg9'
+    assert store.info('Msg3') == 'info 3'
+
+
+def test_edited_info_overlay():
+    store = MessageStore([message('Hk', info='old'), message('Noop', info='noop')])
+    store.set_info('Hk', 'edited')
+    store.set_info('Missing', 'ignored')
+    assert store.info('Hk') == 'edited'
+    assert store.info('Noop') == 'noop'
+    assert store.edited_infos() == {'Hk': 'edited'}
+    # the packed blob is left as it was
+    assert b'old' in bytes(store._infos)
+
+    copy = store.copy()
+    copy.set_info('Noop', 'copy only')
+    assert store.info('Noop') == 'noop'
+    assert copy.info('Hk') == 'edited'
+
+    # edits of a chunk come along with it
+    part = MessageStore([message('Header', MessageInfo.HELPER)])
+    part.set_info('Header', 'from chunk')
+    store.extend(part)
+    assert store.edited_infos() == {'Hk': 'edited', 'Header': 'from chunk'}
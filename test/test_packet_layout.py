@@ -0,0 +1,123 @@
+import json
+import logging
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+from rqt_fsw_bridge_dictionary.dictionary_cache import CachedMessageInfo
+from rqt_fsw_bridge_dictionary.dictionary_info import DictionaryInfo
+from rqt_fsw_bridge_dictionary.packet_layout import FieldLayout, format_size, PacketLayout
+
+
+class _Node:
+    # all DictionaryInfo needs of a node is its logger
+    def get_logger(self):
+        return logging.getLogger('test_packet_layout')
+
+
+MESSAGES = {
+    # Header is used by both Hk and Noop
+    'Header': (MessageInfo.HELPER, {'seq': 'uint32', 'stamp': 'uint64'}),
+    'Hk': (MessageInfo.TELEMETRY, {'header': 'cfe_msgs/Header', 'count': 'uint16',
+                                   'temps': 'float32[4]', 'name': 'string<=8',
+                                   'flags': 'uint8'}),
+    'Noop': (MessageInfo.COMMAND, {'header': 'cfe_msgs/Header', 'code': 'uint8'}),
+    'Table': (MessageInfo.TELEMETRY, {'stamps': 'cfe_msgs/Header[2]', 'rows': 'uint16[<=3]',
+                                      'labels': 'string<=4[2]'}),
+    'Log': (MessageInfo.TELEMETRY, {'count': 'uint8', 'text': 'string',
+                                    'other': 'other_msgs/Foo'}),
+    # a recursive type, and a cycle through a bounded sequence
+    'Node': (MessageInfo.HELPER, {'value': 'int16', 'children': 'cfe_msgs/Node[]'}),
+    'Tree': (MessageInfo.TELEMETRY, {'depth': 'uint8', 'root': 'cfe_msgs/Node'}),
+    'Ping': (MessageInfo.HELPER, {'seq': 'uint8', 'pong': 'cfe_msgs/Pong'}),
+    'Pong': (MessageInfo.HELPER, {'seq': 'uint8', 'pings': 'cfe_msgs/Ping[<=2]'}),
+}
+
+
+def make_dictionary(messages=MESSAGES):
+    message_infos = [CachedMessageInfo(name, msg_type, json.dumps(fields), "")
+                     for name, (msg_type, fields) in messages.items()]
+    dictionary_info = DictionaryInfo(_Node())
+    dictionary_info.init('cfe_plugin', 'cfe_msgs', message_infos)
+    return dictionary_info
+
+
+def test_fixed_sizes():
+    layout = PacketLayout(make_dictionary())
+    assert layout.type_size('Header') == (12, 12)
+    assert layout.type_size('Noop') == (13, 13)
+    assert layout.field_size('float32[4]') == (16, 16)
+    assert layout.field_size('cfe_msgs/Header[2]') == (24, 24)
+    assert layout.type_size('Missing') is None
+
+
+def test_bounded_and_unbounded_sizes():
+    layout = PacketLayout(make_dictionary())
+    assert layout.field_size('string<=8') == (None, 8)
+    assert layout.field_size('string') == (None, None)
+    assert layout.field_size('uint16[<=3]') == (None, 6)
+    assert layout.field_size('string<=4[2]') == (None, 8)
+    assert layout.field_size('uint8[]') == (None, None)
+    # header 12, count 2, temps 16, name <= 8, flags 1
+    assert layout.type_size('Hk') == (None, 39)
+    assert layout.type_size('Table') == (None, 24 + 6 + 8)
+    # a string and an unknown type leave no bound
+    assert layout.type_size('Log') == (None, None)
+
+
+def test_field_offsets():
+    layout = PacketLayout(make_dictionary())
+    assert layout.type_layout('Hk').fields == (
+        FieldLayout('header', 'cfe_msgs/Header', 0, 12, 12),
+        FieldLayout('count', 'uint16', 12, 2, 2),
+        FieldLayout('temps', 'float32[4]', 14, 16, 16),
+        FieldLayout('name', 'string<=8', 30, None, 8),
+        FieldLayout('flags', 'uint8', None, 1, 1),
+    )
+    noop = layout.type_layout('Noop')
+    assert (noop.size, noop.max_size) == (13, 13)
+    assert [(f.name, f.offset) for f in noop.fields] == [('header', 0), ('code', 12)]
+    assert layout.type_layout('Noop') is noop
+    assert layout.type_layout('Missing') is None
+
+
+def test_recursive_type():
+    layout = PacketLayout(make_dictionary())
+    assert layout.type_size('Tree') == (None, None)
+    assert layout.type_size('Node') == (None, None)
+    assert [(f.name, f.offset) for f in layout.type_layout('Tree').fields] == [
+        ('depth', 0), ('root', 1)]
+
+
+def test_cycle_is_memoized_as_unsized():
+    layout = PacketLayout(make_dictionary())
+    assert layout.type_size('Ping') == (None, None)
+    # Pong was sized while Ping was in progress; its unsized result is kept
+    assert layout._sizes['Pong'] == (None, None)
+    assert layout.type_size('Pong') == (None, None)
+    assert not layout._in_progress
+
+
+def test_sizes_are_memoized():
+    dictionary_info = make_dictionary()
+    layout = PacketLayout(dictionary_info)
+    visits = []
+    get_message_items = dictionary_info.get_message_items
+
+    def counting_get_message_items(msg_name):
+        visits.append(msg_name)
+        return get_message_items(msg_name)
+
+    dictionary_info.get_message_items = counting_get_message_items
+    sizes = {name: (size, max_size) for name, size, max_size in layout.message_sizes()}
+    assert sizes['Noop'] == (13, 13)
+    assert sizes['Hk'] == (None, 39)
+    # Header is shared by several messages but laid out once, as is every other type
+    assert sorted(visits) == sorted(MESSAGES)
+    layout.message_sizes(['Hk', 'Noop'])
+    assert len(visits) == len(MESSAGES)
+
+
+def test_format_size():
+    assert format_size(12, 12) == '12'
+    assert format_size(None, 39) == '<= 39'
+    assert format_size(None, None) == 'var'
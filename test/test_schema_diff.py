@@ -0,0 +1,82 @@
+import json
+import logging
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+from rqt_fsw_bridge_dictionary.dictionary_cache import CachedMessageInfo
+from rqt_fsw_bridge_dictionary.dictionary_info import DictionaryInfo
+from rqt_fsw_bridge_dictionary.dictionary_snapshot import snapshot_dictionary
+from rqt_fsw_bridge_dictionary.schema_diff import diff_snapshots, format_diff
+
+
+class _Node:
+    # all DictionaryInfo needs of a node is its logger
+    def get_logger(self):
+        return logging.getLogger('test_schema_diff')
+
+
+def make_snapshot(messages):
+    # messages: {name: (msg_type, {field: type})}
+    message_infos = [CachedMessageInfo(name, msg_type, json.dumps(fields), "")
+                     for name, (msg_type, fields) in messages.items()]
+    dictionary_info = DictionaryInfo(_Node())
+    dictionary_info.init('cfe_plugin', 'cfe_msgs', message_infos)
+    return snapshot_dictionary(dictionary_info)
+
+
+BASE = {
+    'Header': (MessageInfo.HELPER, {'seq': 'uint32', 'stamp': 'uint64'}),
+    'Noop': (MessageInfo.COMMAND, {'header': 'cfe_msgs/Header', 'code': 'uint8'}),
+    'Hk': (MessageInfo.TELEMETRY, {'header': 'cfe_msgs/Header', 'count': 'uint16'}),
+}
+
+
+def changed(diff):
+    return {c.name: c for c in diff.changed}
+
+
+def test_no_changes():
+    assert diff_snapshots(make_snapshot(BASE), make_snapshot(BASE)) == ([], [], [])
+
+
+def test_renamed_field():
+    new = dict(BASE, Noop=(MessageInfo.COMMAND, {'header': 'cfe_msgs/Header', 'cc': 'uint8'}))
+    diff = diff_snapshots(make_snapshot(BASE), make_snapshot(new))
+    assert list(changed(diff)) == ['Noop']
+    change = changed(diff)['Noop']
+    assert change.added_fields == [('cc', 'uint8')]
+    assert change.removed_fields == [('code', 'uint8')]
+    assert change.changed_fields == []
+
+
+def test_retyped_field():
+    new = dict(BASE, Hk=(MessageInfo.TELEMETRY, {'header': 'cfe_msgs/Header',
+                                                 'count': 'uint32'}))
+    diff = diff_snapshots(make_snapshot(BASE), make_snapshot(new))
+    change = changed(diff)['Hk']
+    assert change.changed_fields == [('count', 'uint16', 'uint32')]
+    assert change.added_fields == change.removed_fields == []
+
+
+def test_retyped_nested_type():
+    # every message embedding the changed type changes with it
+    new = dict(BASE, Header=(MessageInfo.HELPER, {'seq': 'uint32', 'stamp': 'float64'}))
+    diff = diff_snapshots(make_snapshot(BASE), make_snapshot(new))
+    changes = changed(diff)
+    assert set(changes) == {'Header', 'Noop', 'Hk'}
+    assert changes['Header'].changed_fields == [('stamp', 'uint64', 'float64')]
+    assert changes['Noop'].changed_fields == []
+    assert changes['Noop'].changed_types == ['Header']
+
+
+def test_added_removed_and_kind():
+    new = dict(BASE, Noop=(MessageInfo.TELEMETRY, BASE['Noop'][1]),
+               Reset=(MessageInfo.COMMAND, {'header': 'cfe_msgs/Header'}))
+    del new['Hk']
+    diff = diff_snapshots(make_snapshot(BASE), make_snapshot(new))
+    assert diff.added == ['Reset']
+    assert diff.removed == ['Hk']
+    change = changed(diff)['Noop']
+    assert (change.old_kind, change.new_kind) == ('COMMAND', 'TELEMETRY')
+    assert list(format_diff(diff)) == ['+ Reset', '- Hk', '~ Noop',
+                                       '    type COMMAND -> TELEMETRY']
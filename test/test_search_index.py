@@ -0,0 +1,72 @@
+from rqt_fsw_bridge_dictionary import search_index
+from rqt_fsw_bridge_dictionary.search_index import SearchIndex, tokenize
+
+
+def make_index():
+    index = SearchIndex()
+    index.add_message('HK_TLM', [('header', 'cfe_msgs/Header'), ('valve_state', 'uint8')],
+                      'housekeeping packet')
+    index.add_message('NOOP_CMD', [('header', 'cfe_msgs/Header')], 'does nothing')
+    index.add_message('Header', [('seq', 'uint32')], '')
+    index.warm_up()
+    return index
+
+
+def test_tokenize():
+    assert tokenize('cfe_msgs/Header') == {'cfe_msgs', 'cfe', 'msgs', 'header'}
+    assert tokenize('HK_TLM: valve-state') == {'hk_tlm', 'hk', 'tlm', 'valve', 'state'}
+    assert tokenize('') == set()
+
+
+def test_search_words_and_prefixes():
+    index = make_index()
+    assert index.search('hk') == {'HK_TLM'}
+    assert index.search('HEAD') == {'HK_TLM', 'NOOP_CMD', 'Header'}
+    assert index.search('valve_st') == {'HK_TLM'}
+    assert index.search('housekeeping pack') == {'HK_TLM'}
+    # only the last word, the one being typed, matches as a prefix
+    assert index.search('house pack') == set()
+    assert index.search('nothing') == {'NOOP_CMD'}
+    assert index.search('   ') == set()
+
+
+def test_search_with_punctuation():
+    # a type as the struct tree shows it is split like the indexed text
+    index = make_index()
+    assert index.search('cfe_msgs/Header') == {'HK_TLM', 'NOOP_CMD'}
+    assert index.search('cfe_msgs/Hea') == {'HK_TLM', 'NOOP_CMD'}
+    assert index.search('valve_state: uint') == {'HK_TLM'}
+    assert index.search('cfe_msgs/Foo') == set()
+
+
+def test_prefix_cache_reuse(monkeypatch):
+    monkeypatch.setattr(search_index, '_CACHE_MIN_POSTINGS', 2)
+    index = make_index()
+    first = index.search('he')
+    assert first == {'HK_TLM', 'NOOP_CMD', 'Header'}
+    # served from the cache, not unioned again
+    assert index.search('he') is first
+    assert 'he' in index._prefix_cache
+
+
+def test_cache_invalidated_by_set_info(monkeypatch):
+    monkeypatch.setattr(search_index, '_CACHE_MIN_POSTINGS', 2)
+    index = make_index()
+    assert index.search('h') == {'HK_TLM', 'NOOP_CMD', 'Header'}
+    assert index.search('no') == {'NOOP_CMD'}
+    index.set_info('Header', 'now with notes')
+    assert index.search('no') == {'NOOP_CMD', 'Header'}
+    assert index.search('notes') == {'Header'}
+
+
+def test_removed_info_tokens():
+    index = make_index()
+    index.set_info('HK_TLM', 'status packet')
+    assert index.search('housekeeping') == set()
+    assert index.search('status') == {'HK_TLM'}
+    # a word the info drops stays found through the name and fields
+    index.set_info('HK_TLM', 'valve')
+    index.set_info('HK_TLM', '')
+    assert index.search('valve') == {'HK_TLM'}
+    assert index.search('packet') == set()
+    assert 'packet' not in index._sorted_tokens
@@ -0,0 +1,98 @@
+import os
+from types import SimpleNamespace
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+import pytest
+import rclpy
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from python_qt_binding.QtWidgets import QApplication  # noqa: E402
+
+from rqt_fsw_bridge_dictionary.dictionary_cache import CachedMessageInfo  # noqa: E402
+from rqt_fsw_bridge_dictionary.shared_dictionary_store import SharedDictionaryStore  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def store(app):
+    rclpy.init()
+    node = rclpy.create_node('test_shared_dictionary_store')
+    store = SharedDictionaryStore.attach(node)
+    yield store
+    store.detach()
+    node.destroy_node()
+    rclpy.shutdown()
+
+
+def make_messages(n):
+    return [CachedMessageInfo('Msg%d' % i, MessageInfo.COMMAND, '{"a": "uint8"}', '')
+            for i in range(n)]
+
+
+def bridge(store, ready=True):
+    # a bridge whose services are up, with every fetch recorded instead of sent
+    connection = store.acquire('/bridge')
+    connection.set_plugin_names('cfe_plugin.cfe', 'cfe_msgs')
+    connection.services_ready = lambda: ready
+    connection.plugin_info = SimpleNamespace(plugin_name='cfe_plugin.cfe', msg_pkg='cfe_msgs')
+    fetches = []
+    store.send_get_message_info_request = fetches.append
+    store.send_plugin_info_request = fetches.append
+    return connection, fetches
+
+
+def poll(store, connection, times=5):
+    # bridge watch ticks with the retry backoff run out
+    for _ in range(times):
+        connection.reset_backoff()
+        store.wait_for_plugin()
+
+
+def test_nothing_is_fetched_after_cancel(store):
+    connection, fetches = bridge(store)
+    connection.connected = True
+    store.apply_dictionary(connection, make_messages(20000), 'first')
+    store.cancel_load(connection)
+    assert connection.ingest is None
+    assert connection.load_cancelled
+
+    poll(store, connection)
+    assert fetches == []
+    # nor is a response that was already on its way loaded
+    store.on_message_info_received('/bridge', SimpleNamespace(msg_info=make_messages(10)),
+                                   'late')
+    assert connection.ingest is None
+
+    store.reload_dictionary(connection)
+    poll(store, connection, times=1)
+    assert fetches == [connection]
+
+
+def test_cancel_ends_when_the_bridge_leaves(store):
+    connection, fetches = bridge(store)
+    connection.connected = True
+    store.apply_dictionary(connection, make_messages(20000), 'first')
+    store.cancel_load(connection)
+
+    connection.services_ready = lambda: False
+    poll(store, connection, times=1)
+    assert not connection.load_cancelled
+    assert not connection.connected
+    connection.services_ready = lambda: True
+    poll(store, connection, times=1)
+    assert fetches == [connection]
+
+
+def test_replaced_load_is_not_cancelled(store):
+    connection, fetches = bridge(store)
+    connection.connected = True
+    store.apply_dictionary(connection, make_messages(20000), 'first')
+    store.apply_dictionary(connection, make_messages(10), 'second')
+    assert not connection.load_cancelled
+    assert connection.ingest.digest == 'second'
+    store.cancel_load(connection)
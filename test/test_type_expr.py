@@ -0,0 +1,72 @@
+import pytest
+
+from rqt_fsw_bridge_dictionary.type_expr import ArrayType, MessageType, parse_type
+from rqt_fsw_bridge_dictionary.type_expr import PRIMITIVE_SIZES, PrimitiveType, resolve_message
+from rqt_fsw_bridge_dictionary.type_expr import SequenceType, StringType, UnknownType
+from rqt_fsw_bridge_dictionary.type_expr import unwrap_collections
+
+
+def test_primitives_and_strings():
+    assert parse_type('uint8') == PrimitiveType('uint8')
+    assert parse_type('string') == StringType('string', None)
+    assert parse_type('string<=16') == StringType('string', 16)
+    assert parse_type('wstring <= 4') == StringType('wstring', 4)
+    assert str(parse_type('string<=16')) == 'string<=16'
+
+
+@pytest.mark.parametrize('name, size', [
+    ('bool', 1), ('char', 1), ('octet', 1), ('uint8', 1), ('wchar', 2), ('int16', 2),
+    ('float32', 4), ('uint32', 4), ('int64', 8), ('float64', 8),
+])
+def test_primitive_sizes(name, size):
+    assert parse_type(name) == PrimitiveType(name)
+    assert PRIMITIVE_SIZES[name] == size
+
+
+def test_sequences():
+    assert parse_type('sequence<uint8>') == SequenceType(PrimitiveType('uint8'), None)
+    assert parse_type('sequence<uint8, 4>') == SequenceType(PrimitiveType('uint8'), 4)
+    assert parse_type('uint8[]') == SequenceType(PrimitiveType('uint8'), None)
+    assert parse_type('uint8[<=4]') == SequenceType(PrimitiveType('uint8'), 4)
+    assert parse_type('sequence<string<=8, 2>') == SequenceType(StringType('string', 8), 2)
+    assert str(parse_type('uint8[<=4]')) == 'sequence<uint8, 4>'
+
+
+def test_arrays():
+    assert parse_type('float32[3]') == ArrayType(PrimitiveType('float32'), 3)
+    # suffixes apply left to right: an array of 3 sequences
+    assert parse_type('int16[][3]') == ArrayType(SequenceType(PrimitiveType('int16'), None), 3)
+    assert str(parse_type('float32[3]')) == 'float32[3]'
+
+
+def test_message_types():
+    assert parse_type('Header') == MessageType(None, 'Header')
+    assert parse_type('cfe_msgs/Header') == MessageType('cfe_msgs', 'Header')
+    assert parse_type('cfe_msgs/msg/Header') == MessageType('cfe_msgs', 'Header')
+    assert parse_type('sequence<cfe_msgs/msg/Header, 2>') == \
+        SequenceType(MessageType('cfe_msgs', 'Header'), 2)
+    # a primitive name followed by '/' is a package
+    assert parse_type('uint8/Foo') == MessageType('uint8', 'Foo')
+
+
+def test_unknown_types():
+    assert parse_type('sequence<uint8') == UnknownType('sequence<uint8')
+    assert parse_type(' uint8 uint8 ') == UnknownType('uint8 uint8')
+    assert parse_type('uint8[x]') == UnknownType('uint8[x]')
+
+
+def test_unwrap_collections():
+    t = parse_type('sequence<cfe_msgs/Foo[4]>')
+    assert unwrap_collections(t) == (MessageType('cfe_msgs', 'Foo'), '[4][]')
+    assert unwrap_collections(parse_type('uint8[<=2]')) == (PrimitiveType('uint8'), '[<=2]')
+    assert unwrap_collections(parse_type('uint8')) == (PrimitiveType('uint8'), '')
+
+
+def test_resolve_message():
+    names = {'Foo', 'Bar'}
+    assert resolve_message(parse_type('Foo'), 'cfe_msgs', names) == 'Foo'
+    assert resolve_message(parse_type('cfe_msgs/msg/Foo[2]'), 'cfe_msgs', names) == 'Foo'
+    assert resolve_message(parse_type('other_msgs/Foo'), 'cfe_msgs', names) is None
+    assert resolve_message(parse_type('cfe_msgs/Baz'), 'cfe_msgs', names) is None
+    assert resolve_message(parse_type('sequence<uint8>'), 'cfe_msgs', names) is None
+    assert resolve_message(parse_type('string<=4'), 'cfe_msgs', names) is None
@@ -0,0 +1,99 @@
+import json
+import logging
+
+from fsw_ros2_bridge_msgs.msg import MessageInfo
+
+from rqt_fsw_bridge_dictionary.dictionary_cache import CachedMessageInfo
+from rqt_fsw_bridge_dictionary.dictionary_info import DictionaryInfo
+from rqt_fsw_bridge_dictionary.type_usage import TypeUsageIndex
+
+
+class _Node:
+    # all DictionaryInfo needs of a node is its logger
+    def get_logger(self):
+        return logging.getLogger('test_type_usage')
+
+
+# Header is a helper shared by Hk and Noop; Status and Mode embed each other and
+# Node embeds itself
+USES = {
+    'Hk': ['Header', 'Status', 'Header'],
+    'Noop': ['Header'],
+    'Header': [],
+    'Status': ['Mode'],
+    'Mode': ['Status', 'Header'],
+    'Node': ['Node'],
+}
+
+
+def make_index():
+    index = TypeUsageIndex()
+    for msg_name, used_types in USES.items():
+        index.add_message(msg_name, used_types)
+    return index
+
+
+def test_direct_users_and_dependencies():
+    index = make_index()
+    assert index.dependencies('Hk') == ('Header', 'Status')
+    assert index.dependencies('Header') == ()
+    assert sorted(index.users('Header')) == ['Hk', 'Mode', 'Noop']
+    assert index.users('Status') == ('Hk', 'Mode')
+    assert index.users('Hk') == ()
+    assert index.users('Node') == ('Node',)
+    assert 'Header' in index
+    assert 'Missing' not in index
+    assert index.dependencies('Missing') == index.users('Missing') == ()
+
+
+def test_transitive_users():
+    index = make_index()
+    assert index.transitive_users('Header') == {'Hk', 'Noop', 'Mode', 'Status'}
+    # a type on a cycle is among its own users
+    assert index.transitive_users('Status') == {'Hk', 'Mode', 'Status'}
+    assert index.transitive_users('Node') == {'Node'}
+    assert index.transitive_users('Hk') == frozenset()
+    # memoized
+    assert index.transitive_users('Header') is index.transitive_users('Header')
+
+
+def test_transitive_dependencies():
+    index = make_index()
+    assert index.transitive_dependencies('Hk') == {'Header', 'Status', 'Mode'}
+    assert index.transitive_dependencies('Mode') == {'Header', 'Status', 'Mode'}
+    assert index.transitive_dependencies('Noop') == {'Header'}
+    assert index.transitive_dependencies('Header') == frozenset()
+    # closures already walked are reused, and give the same answer in any order
+    fresh = make_index()
+    assert fresh.transitive_dependencies('Status') == {'Header', 'Status', 'Mode'}
+    assert fresh.transitive_dependencies('Hk') == index.transitive_dependencies('Hk')
+
+
+def test_components():
+    components = make_index().components()
+    assert sorted(sorted(c) for c in components) == [
+        ['Header'], ['Hk'], ['Mode', 'Status'], ['Node'], ['Noop']]
+    # dependencies first: every type comes after the components it embeds
+    position = {name: i for i, component in enumerate(components) for name in component}
+    for msg_name, used_types in USES.items():
+        for type_name in used_types:
+            assert position[type_name] <= position[msg_name]
+
+
+def test_built_from_dictionary():
+    messages = {
+        'Header': (MessageInfo.HELPER, {'seq': 'uint32'}),
+        'Hk': (MessageInfo.TELEMETRY, {'header': 'cfe_msgs/Header',
+                                       'history': 'cfe_msgs/msg/Header[<=4]',
+                                       'other': 'other_msgs/Header', 'count': 'uint8'}),
+        'Noop': (MessageInfo.COMMAND, {'header': 'Header'}),
+    }
+    message_infos = [CachedMessageInfo(name, msg_type, json.dumps(fields), "")
+                     for name, (msg_type, fields) in messages.items()]
+    dictionary_info = DictionaryInfo(_Node())
+    dictionary_info.init('cfe_plugin', 'cfe_msgs', message_infos)
+    index = dictionary_info.build_type_usage()
+    # a type of another package keeps its package, primitives are not dependencies
+    assert index.dependencies('Hk') == ('Header', 'other_msgs/Header')
+    assert index.users('other_msgs/Header') == ('Hk',)
+    assert sorted(index.users('Header')) == ['Hk', 'Noop']